@@ -2,11 +2,21 @@
 """Compare detected vs ground truth boxes"""
 
 import json
+import numpy as np
 from pathlib import Path
 from detection.preprocessing_adaptive import preprocess_pipeline_adaptive
 from detection.opencv_detector_adaptive import detect_rooms_adaptive
 from detection.normalizer import normalize_coordinates
 
+
+def box_sizes(rooms):
+    """Return (boxes, widths, heights, areas) arrays for normalized room boxes"""
+    boxes = np.array([r['bounding_box_normalized'] for r in rooms], dtype=np.float64).reshape(-1, 4)
+    widths = boxes[:, 2] - boxes[:, 0]
+    heights = boxes[:, 3] - boxes[:, 1]
+    return boxes, widths, heights, widths * heights
+
+
 # Load sample
 sample_path = Path("../test_data/blueprints/sample_02.png")
 gt_path = Path("ground_truth/sample_02_ground_truth.json")
@@ -19,23 +29,21 @@ with open(gt_path, 'r') as f:
 
 # Run detection
 preprocessed = preprocess_pipeline_adaptive(image_data)
-detected_rooms = detect_rooms_adaptive(preprocessed)
+detected_rooms = detect_rooms_adaptive(preprocessed)['rooms']
 detected_rooms = normalize_coordinates(detected_rooms, preprocessed['original_shape'])
 
 print("GROUND TRUTH ROOMS:")
 print("=" * 60)
-for i, room in enumerate(ground_truth['rooms'], 1):
-    box = room['bounding_box_normalized']
-    print(f"{i}. {room['id']}: [{box[0]:.3f}, {box[1]:.3f}, {box[2]:.3f}, {box[3]:.3f}]")
-    width = box[2] - box[0]
-    height = box[3] - box[1]
-    print(f"   Size: {width:.3f} x {height:.3f}, Area: {width*height:.4f}")
+boxes, widths, heights, areas = box_sizes(ground_truth['rooms'])
+for i, room in enumerate(ground_truth['rooms']):
+    box = boxes[i]
+    print(f"{i + 1}. {room['id']}: [{box[0]:.3f}, {box[1]:.3f}, {box[2]:.3f}, {box[3]:.3f}]")
+    print(f"   Size: {widths[i]:.3f} x {heights[i]:.3f}, Area: {areas[i]:.4f}")
 
 print("\nDETECTED ROOMS:")
 print("=" * 60)
-for i, room in enumerate(detected_rooms, 1):
-    box = room['bounding_box_normalized']
-    print(f"{i}. {room['id']}: [{box[0]:.3f}, {box[1]:.3f}, {box[2]:.3f}, {box[3]:.3f}]")
-    width = box[2] - box[0]
-    height = box[3] - box[1]
-    print(f"   Size: {width:.3f} x {height:.3f}, Area: {width*height:.4f}, Conf: {room.get('confidence_score', 0):.2f}")
+boxes, widths, heights, areas = box_sizes(detected_rooms)
+for i, room in enumerate(detected_rooms):
+    box = boxes[i]
+    print(f"{i + 1}. {room['id']}: [{box[0]:.3f}, {box[1]:.3f}, {box[2]:.3f}, {box[3]:.3f}]")
+    print(f"   Size: {widths[i]:.3f} x {heights[i]:.3f}, Area: {areas[i]:.4f}, Conf: {room.get('confidence_score', 0):.2f}")
@@ -15,6 +15,7 @@ import numpy as np
 import sys
 import argparse
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 # Import both detection pipelines
@@ -31,6 +32,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Room label font (Hershey digits are fixed-width, so label size depends only on length)
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_FONT_SCALE = 0.5
+
+
+def _build_rainbow_lut() -> list:
+    """BGR color for every OpenCV hue (0-179) at full saturation and value"""
+    hsv = np.full((1, 180, 3), 255, dtype=np.uint8)
+    hsv[0, :, 0] = np.arange(180)
+    bgr = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0]
+    return [tuple(map(int, color)) for color in bgr]
+
+
+RAINBOW_LUT = _build_rainbow_lut()
+
 
 def load_image(image_path: str) -> bytes:
     """Load image file as bytes"""
@@ -60,10 +76,7 @@ def draw_rooms_on_image(image: np.ndarray, rooms: list, color_scheme: str = 'rai
     # Generate colors
     colors = []
     if color_scheme == 'rainbow':
-        for i in range(len(rooms)):
-            hue = int(180 * i / max(len(rooms), 1))
-            color = cv2.cvtColor(np.uint8([[[hue, 255, 255]]]), cv2.COLOR_HSV2BGR)[0][0]
-            colors.append(tuple(map(int, color)))
+        colors = [RAINBOW_LUT[i * 180 // len(rooms)] for i in range(len(rooms))]
     elif color_scheme == 'confidence':
         for room in rooms:
             conf = room.get('confidence_score', 0.5)
@@ -73,6 +86,9 @@ def draw_rooms_on_image(image: np.ndarray, rooms: list, color_scheme: str = 'rai
     else:  # single color
         colors = [(0, 255, 0)] * len(rooms)
 
+    # Label sizes keyed by label length
+    text_sizes = {}
+
     # Draw each room
     for idx, room in enumerate(rooms):
         bbox = room['bounding_box']
@@ -89,7 +105,9 @@ def draw_rooms_on_image(image: np.ndarray, rooms: list, color_scheme: str = 'rai
             label += f" ({room['confidence_score']:.2f})"
 
         # Background for text
-        (text_w, text_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        if len(label) not in text_sizes:
+            text_sizes[len(label)] = cv2.getTextSize(label, LABEL_FONT, LABEL_FONT_SCALE, 1)[0]
+        text_w, text_h = text_sizes[len(label)]
         cv2.rectangle(output, (x_min, y_min - text_h - 4), (x_min + text_w, y_min), color, -1)
 
         # Text
@@ -97,8 +115,8 @@ def draw_rooms_on_image(image: np.ndarray, rooms: list, color_scheme: str = 'rai
             output,
             label,
             (x_min, y_min - 2),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
+            LABEL_FONT,
+            LABEL_FONT_SCALE,
             (255, 255, 255),
             1,
             cv2.LINE_AA
@@ -134,7 +152,10 @@ def create_comparison_image(
     processed_height = preprocessed_original['processed'].shape[0]
     processed_width = preprocessed_original['processed'].shape[1]
 
-    resized_original = cv2.resize(original_image, (processed_width, processed_height))
+    if original_image.shape[:2] == (processed_height, processed_width):
+        resized_original = original_image  # Not rescaled by preprocessing
+    else:
+        resized_original = cv2.resize(original_image, (processed_width, processed_height))
 
     # Draw rooms on copies
     img_with_original = draw_rooms_on_image(resized_original, original_rooms, 'confidence')
@@ -169,15 +190,17 @@ def add_title(image: np.ndarray, title: str, font_scale: float = 1.0) -> np.ndar
     font = cv2.FONT_HERSHEY_SIMPLEX
     thickness = 2
 
-    # Calculate text size
-    (text_w, text_h), baseline = cv2.getTextSize(title, font, font_scale, thickness)
+    # Calculate text size. The bar height uses the descender depth of "g" so
+    # every title gets the same bar and titled images can be stacked
+    (text_w, text_h), _ = cv2.getTextSize(title, font, font_scale, thickness)
+    _, baseline = cv2.getTextSize("g", font, font_scale, thickness)
 
-    # Create new image with title bar
+    # Create new image with title bar - every byte is written below, so skip zero-fill
     title_height = text_h + baseline + 20
-    output = np.zeros((image.shape[0] + title_height, image.shape[1], 3), dtype=np.uint8)
+    output = np.empty((image.shape[0] + title_height, image.shape[1], 3), dtype=np.uint8)
 
     # Draw title background
-    cv2.rectangle(output, (0, 0), (image.shape[1], title_height), (50, 50, 50), -1)
+    output[:title_height] = (50, 50, 50)
 
     # Draw title text
     text_x = (image.shape[1] - text_w) // 2
@@ -190,6 +213,32 @@ def add_title(image: np.ndarray, title: str, font_scale: float = 1.0) -> np.ndar
     return output
 
 
+def run_pipeline(name: str, preprocess_fn, detect_fn, image_data: bytes) -> tuple:
+    """
+    Run one preprocessing + detection pipeline
+
+    Returns:
+        Tuple of (preprocessed, rooms); (None, []) if the pipeline failed
+    """
+    logger.info(f"Running {name.upper()} pipeline")
+    try:
+        preprocessed = preprocess_fn(image_data)
+        rooms = detect_fn(preprocessed)
+        logger.info(f"{name} pipeline: Detected {len(rooms)} rooms")
+        return preprocessed, rooms
+    except Exception as e:
+        logger.error(f"{name} pipeline failed: {str(e)}")
+        return None, []
+
+
+def average_confidence(rooms: list) -> float:
+    """Mean confidence score of a non-empty room list"""
+    confidences = np.fromiter(
+        (r.get('confidence_score', 0) for r in rooms), dtype=np.float64, count=len(rooms)
+    )
+    return float(confidences.mean())
+
+
 def print_comparison_stats(original_rooms: list, improved_rooms: list):
     """Print statistics comparing both approaches"""
 
@@ -203,11 +252,11 @@ def print_comparison_stats(original_rooms: list, improved_rooms: list):
     print(f"  Difference:         {len(improved_rooms) - len(original_rooms):+d} rooms")
 
     if original_rooms:
-        avg_conf_orig = sum(r.get('confidence_score', 0) for r in original_rooms) / len(original_rooms)
+        avg_conf_orig = average_confidence(original_rooms)
         print(f"\nAverage Confidence (Original): {avg_conf_orig:.2f}")
 
     if improved_rooms:
-        avg_conf_impr = sum(r.get('confidence_score', 0) for r in improved_rooms) / len(improved_rooms)
+        avg_conf_impr = average_confidence(improved_rooms)
         print(f"Average Confidence (Improved): {avg_conf_impr:.2f}")
 
     print("\nOriginal Pipeline Rooms:")
@@ -244,37 +293,23 @@ def main():
     logger.info(f"Loading blueprint: {args.image}")
     image_data = load_image(args.image)
 
-    # Load original image for display
-    original_image = cv2.imread(args.image)
+    # Decode the already-loaded bytes for display instead of reading the file again
+    original_image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
     if original_image is None:
         logger.error(f"Failed to load image: {args.image}")
         sys.exit(1)
 
-    # Run ORIGINAL pipeline
-    logger.info("="*70)
-    logger.info("RUNNING ORIGINAL PIPELINE")
-    logger.info("="*70)
-    try:
-        preprocessed_original = preprocess_pipeline(image_data)
-        rooms_original = detect_rooms_opencv(preprocessed_original)
-        logger.info(f"Original pipeline: Detected {len(rooms_original)} rooms")
-    except Exception as e:
-        logger.error(f"Original pipeline failed: {str(e)}")
-        rooms_original = []
-        preprocessed_original = None
-
-    # Run IMPROVED pipeline
-    logger.info("\n" + "="*70)
-    logger.info("RUNNING IMPROVED PIPELINE")
-    logger.info("="*70)
-    try:
-        preprocessed_improved = preprocess_pipeline_improved(image_data)
-        rooms_improved = detect_rooms_improved(preprocessed_improved)
-        logger.info(f"Improved pipeline: Detected {len(rooms_improved)} rooms")
-    except Exception as e:
-        logger.error(f"Improved pipeline failed: {str(e)}")
-        rooms_improved = []
-        preprocessed_improved = None
+    # Run both pipelines concurrently - they share no state and OpenCV
+    # releases the GIL inside its kernels
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        future_original = executor.submit(
+            run_pipeline, "Original", preprocess_pipeline, detect_rooms_opencv, image_data
+        )
+        future_improved = executor.submit(
+            run_pipeline, "Improved", preprocess_pipeline_improved, detect_rooms_improved, image_data
+        )
+        preprocessed_original, rooms_original = future_original.result()
+        preprocessed_improved, rooms_improved = future_improved.result()
 
     # Print statistics
     print_comparison_stats(rooms_original, rooms_improved)
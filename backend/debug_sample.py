@@ -33,31 +33,36 @@ processed_image = preprocessed['processed']
 
 print(f"Preprocessed image shape: {processed_image.shape}")
 print(f"Preprocessed image type: {processed_image.dtype}")
-print(f"Preprocessed unique values: {np.unique(processed_image)}")
+# Distinct uint8 values via a 256-bin histogram (no full-image sort)
+print(f"Preprocessed unique values: {np.flatnonzero(np.bincount(processed_image.ravel(), minlength=256))}")
 
 # Save preprocessed image for visualization
 cv2.imwrite('/tmp/preprocessed_sample_02.png', processed_image)
 print("Saved preprocessed image to /tmp/preprocessed_sample_02.png")
 
-# Find contours
-contours, hierarchy = cv2.findContours(
+# Find contours (hierarchy is not needed for the stats below; RETR_LIST keeps
+# the inner room contours without building the tree)
+contours, _ = cv2.findContours(
     processed_image,
-    cv2.RETR_TREE,
+    cv2.RETR_LIST,
     cv2.CHAIN_APPROX_SIMPLE
 )
 
 print(f"\nFound {len(contours)} total contours")
 
 # Analyze contour sizes
-areas = [cv2.contourArea(c) for c in contours]
-areas_sorted = sorted(areas, reverse=True)
+areas = np.fromiter((cv2.contourArea(c) for c in contours), dtype=np.float64, count=len(contours))
 
-print(f"Top 20 contour areas: {areas_sorted[:20]}")
-print(f"Contours > 1000px: {sum(1 for a in areas if a > 1000)}")
-print(f"Contours > 5000px: {sum(1 for a in areas if a > 5000)}")
+# Only the 20 largest need sorting
+top_areas = np.partition(areas, len(areas) - 20)[-20:] if len(areas) > 20 else areas
+top_areas = np.sort(top_areas)[::-1]
+
+print(f"Top 20 contour areas: {top_areas.tolist()}")
+print(f"Contours > 1000px: {int((areas > 1000).sum())}")
+print(f"Contours > 5000px: {int((areas > 5000).sum())}")
 
 # Run detection
-detected_rooms = detect_rooms_adaptive(preprocessed)
+detected_rooms = detect_rooms_adaptive(preprocessed)['rooms']
 detected_rooms = normalize_coordinates(detected_rooms, preprocessed['original_shape'])
 
 print(f"\nDetected {len(detected_rooms)} rooms")
@@ -7,8 +7,13 @@ Tune these parameters based on your blueprint characteristics:
 - Adjust morph_open_size to control detail elimination
 """
 
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from types import MappingProxyType
+
+
 # Preprocessing Configuration
-PREPROCESSING = {
+PREPROCESSING = MappingProxyType({
     # Image sizing
     'max_dimension': 2000,           # Max width/height after resize
                                       # Larger = more detail but slower
@@ -33,12 +38,16 @@ PREPROCESSING = {
 
     # File limits
     'min_file_size': 10_000,
-    'max_file_size': 10_485_760       # 10MB
-}
+    'max_file_size': 10_485_760,      # 10MB
+
+    # Hardware acceleration
+    'use_opencl': False               # Run denoise + CLAHE via OpenCL (T-API)
+                                      # Only takes effect if cv2.ocl.haveOpenCL()
+})
 
 
 # Detection Configuration
-DETECTION = {
+DETECTION = MappingProxyType({
     # Size constraints (in pixels, based on 2000px max dimension)
     'min_room_area_pixels': 5000,     # Minimum room size
                                       # INCREASE to 8000-10000 if getting tiny false positives
@@ -76,54 +85,93 @@ DETECTION = {
                                       # Lower = more aggressive duplicate removal
 
     'max_rooms': 50                   # Maximum rooms to return
-}
+})
 
 
 # Preset configurations for different blueprint types
 
-PRESETS = {
-    'clean_cad': {
+PRESETS = MappingProxyType({
+    'clean_cad': MappingProxyType({
         # For clean CAD exports with minimal noise
         'morph_open_size': 3,
         'min_room_area_pixels': 5000,
         'min_solidity': 0.6,
-    },
+    }),
 
-    'detailed_cad': {
+    'detailed_cad': MappingProxyType({
         # For CAD with furniture/fixtures (RECOMMENDED FOR YOUR USE CASE)
         'morph_open_size': 7,          # More aggressive detail removal
         'min_room_area_pixels': 8000,  # Larger minimum size
         'min_solidity': 0.7,           # Stricter shape requirements
         'min_area_ratio_to_parent': 0.10,
-    },
+    }),
 
-    'scanned': {
+    'scanned': MappingProxyType({
         # For scanned/photographed blueprints with noise
         'denoise_strength': 15,
         'morph_open_size': 5,
         'min_room_area_pixels': 6000,
         'min_solidity': 0.5,           # More lenient for noise
-    },
+    }),
 
-    'hand_drawn': {
+    'hand_drawn': MappingProxyType({
         # For hand-drawn sketches
         'morph_open_size': 4,
         'min_room_area_pixels': 4000,
         'min_solidity': 0.4,           # Very lenient
         'min_extent': 0.4,
-    }
-}
-
-
+    })
+})
+
+
+@dataclass(frozen=True, slots=True)
+class PreprocessingConfig:
+    """Immutable preprocessing settings (see PREPROCESSING for descriptions)"""
+    max_dimension: int
+    denoise_strength: int
+    contrast_clip_limit: float
+    morph_close_size: int
+    morph_close_iterations: int
+    morph_open_size: int
+    morph_open_iterations: int
+    morph_dilate_size: int
+    morph_dilate_iterations: int
+    min_file_size: int
+    max_file_size: int
+    use_opencl: bool
+
+
+@dataclass(frozen=True, slots=True)
+class DetectionConfig:
+    """Immutable detection settings (see DETECTION for descriptions)"""
+    min_room_area_pixels: int
+    max_room_area_pixels: int
+    min_room_dimension: int
+    min_aspect_ratio: float
+    max_aspect_ratio: float
+    hallway_aspect_ratio: float
+    min_area_ratio_to_parent: float
+    max_area_ratio_to_parent: float
+    min_solidity: float
+    min_extent: float
+    iou_threshold: float
+    max_rooms: int
+
+
+@lru_cache(maxsize=None)
 def apply_preset(preset_name: str) -> tuple:
     """
     Apply a preset configuration
 
+    Presets are static, so the merged configs are built once per preset and
+    cached. The returned configs are frozen; use apply_preset_mutable() if
+    you need to tweak them further.
+
     Args:
         preset_name: One of 'clean_cad', 'detailed_cad', 'scanned', 'hand_drawn'
 
     Returns:
-        Tuple of (preprocessing_config, detection_config)
+        Tuple of (PreprocessingConfig, DetectionConfig)
     """
 
     if preset_name not in PRESETS:
@@ -142,14 +190,33 @@ def apply_preset(preset_name: str) -> tuple:
         elif key in det_config:
             det_config[key] = value
 
-    return prep_config, det_config
+    return PreprocessingConfig(**prep_config), DetectionConfig(**det_config)
+
+
+def apply_preset_mutable(preset_name: str) -> tuple:
+    """
+    Apply a preset configuration, returning dicts the caller may modify
+
+    Args:
+        preset_name: One of 'clean_cad', 'detailed_cad', 'scanned', 'hand_drawn'
+
+    Returns:
+        Tuple of (preprocessing_config, detection_config) as fresh dicts
+    """
+    prep_config, det_config = apply_preset(preset_name)
+    return asdict(prep_config), asdict(det_config)
 
 
 # Usage example:
 # from detection.config import apply_preset, DETECTION, PREPROCESSING
 #
-# # Use detailed_cad preset (recommended)
+# # Use detailed_cad preset (recommended, frozen and cached)
 # prep_config, det_config = apply_preset('detailed_cad')
+# det_config.min_solidity  # 0.7
+#
+# # Start from a preset and adjust it
+# prep_config, det_config = apply_preset_mutable('detailed_cad')
+# det_config['min_solidity'] = 0.75
 #
 # # Or manually tune
 # det_config = DETECTION.copy()
@@ -3,15 +3,34 @@ Debug Visualization Module
 Saves intermediate processing steps for debugging and analysis
 """
 
+import atexit
 import cv2
 import numpy as np
 import os
+import queue
+import threading
+import weakref
 from pathlib import Path
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# PNG encoder settings for debug output. Only the strategy is set: passing
+# IMWRITE_PNG_COMPRESSION disables OpenCV's fast default filter and slows
+# encoding down. Binary masks are long runs of 0/255 that RLE handles best;
+# photographic overlays encode faster (and smaller) with FILTERED.
+PNG_MASK_PARAMS = [cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_RLE]
+PNG_IMAGE_PARAMS = [cv2.IMWRITE_PNG_STRATEGY, cv2.IMWRITE_PNG_STRATEGY_FILTERED]
+
+
+def _is_binary_mask(image: np.ndarray) -> bool:
+    """Cheap check for single-channel 0/255 masks using a sparse pixel sample"""
+    if image.ndim != 2 or image.dtype != np.uint8:
+        return False
+    sample = image[::64, ::64]
+    return not np.any((sample != 0) & (sample != 255))
+
 
 class DebugVisualizer:
     """
@@ -22,12 +41,18 @@ class DebugVisualizer:
         visualizer.save('1_original', gray_image)
         visualizer.save('2_threshold', binary_image)
         visualizer.save_with_contours('5_detected_rooms', image, contours, rooms)
+        visualizer.flush()  # wait for pending writes
+
+    Images are encoded and written by a background thread so debug runs
+    don't stall detection on PNG compression and disk I/O.
     """
 
     def __init__(self, enabled: bool = False, output_dir: str = 'debug_output'):
         self.enabled = enabled
         self.output_dir = Path(output_dir)
         self.session_id = None
+        self._reset_writer()
+        _live_visualizers.add(self)
 
         if self.enabled:
             # Create output directory if it doesn't exist
@@ -35,23 +60,58 @@ class DebugVisualizer:
             self.session_id = datetime.now().strftime('%Y%m%d_%H%M%S')
             logger.info(f"Debug visualization enabled. Session: {self.session_id}")
 
+    def _reset_writer(self):
+        """Start with an empty queue and no writer thread"""
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
     def save(self, name: str, image: np.ndarray, description: str = None):
-        """Save an image to the debug output directory"""
+        """Queue an image to be saved to the debug output directory"""
         if not self.enabled:
             return
 
-        try:
-            filename = f"{self.session_id}_{name}.png"
-            filepath = self.output_dir / filename
+        # Copy so the caller can keep modifying its array while the write is pending
+        self._enqueue(name, image.copy(), description)
 
-            cv2.imwrite(str(filepath), image)
-            logger.debug(f"Saved debug image: {filename}")
+    def flush(self):
+        """Block until all queued debug images have been written"""
+        if self._writer is not None:
+            self._queue.join()
 
-            if description:
-                logger.info(f"Debug: {name} - {description}")
+    def _enqueue(self, name: str, image: np.ndarray, description: str = None):
+        """Hand an image the caller no longer needs to the writer thread"""
+        self._start_writer()
+        filename = f"{self.session_id}_{name}.png"
+        self._queue.put((name, filename, image))
 
-        except Exception as e:
-            logger.warning(f"Failed to save debug image {name}: {e}")
+        if description:
+            logger.info(f"Debug: {name} - {description}")
+
+    def _start_writer(self):
+        """Start the background writer thread on first use"""
+        if self._writer is not None:
+            return
+
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._writer_loop, name='debug-image-writer', daemon=True
+                )
+                self._writer.start()
+
+    def _writer_loop(self):
+        """Write queued images to disk until the process exits"""
+        while True:
+            name, filename, image = self._queue.get()
+            try:
+                params = PNG_MASK_PARAMS if _is_binary_mask(image) else PNG_IMAGE_PARAMS
+                cv2.imwrite(str(self.output_dir / filename), image, params)
+                logger.debug(f"Saved debug image: {filename}")
+            except Exception as e:
+                logger.warning(f"Failed to save debug image {name}: {e}")
+            finally:
+                self._queue.task_done()
 
     def save_with_contours(self, name: str, image: np.ndarray,
                           contours: list, room_indices: list = None,
@@ -74,7 +134,7 @@ class DebugVisualizer:
             else:
                 cv2.drawContours(vis_image, contours, -1, color, thickness)
 
-            self.save(name, vis_image)
+            self._enqueue(name, vis_image)
 
         except Exception as e:
             logger.warning(f"Failed to save debug contours {name}: {e}")
@@ -104,7 +164,7 @@ class DebugVisualizer:
                 cv2.putText(vis_image, label, (x1, y1 - 5),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
 
-            self.save(name, vis_image, f"Detected {len(rooms)} rooms")
+            self._enqueue(name, vis_image, f"Detected {len(rooms)} rooms")
 
         except Exception as e:
             logger.warning(f"Failed to save debug bboxes {name}: {e}")
@@ -115,34 +175,62 @@ class DebugVisualizer:
             return
 
         try:
-            # Resize all images to same height
+            # Resize all images to same height, writing each one straight
+            # into its slot of a preallocated side-by-side canvas
             h = max(img.shape[0] for img in images)
-            resized = []
+            widths = [int(img.shape[1] * (h / img.shape[0])) for img in images]
+            comparison = np.empty((h, sum(widths), 3), dtype=np.uint8)
 
-            for img in images:
-                if len(img.shape) == 2:
-                    img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+            x_offset = 0
+            for img, new_w in zip(images, widths):
+                slot = comparison[:, x_offset:x_offset + new_w]
 
-                scale = h / img.shape[0]
-                new_w = int(img.shape[1] * scale)
-                resized_img = cv2.resize(img, (new_w, h))
-                resized.append(resized_img)
+                if len(img.shape) == 2:
+                    # Resize the single channel first, then expand into the slot
+                    if img.shape[:2] != (h, new_w):
+                        img = cv2.resize(img, (new_w, h))
+                    cv2.cvtColor(img, cv2.COLOR_GRAY2BGR, dst=slot)
+                elif img.shape[:2] != (h, new_w):
+                    cv2.resize(img, (new_w, h), dst=slot)
+                else:
+                    slot[:] = img
 
-            # Concatenate horizontally
-            comparison = np.hstack(resized)
+                x_offset += new_w
 
             # Add labels
             for i, label in enumerate(labels):
-                x_offset = sum(img.shape[1] for img in resized[:i]) + 10
+                x_offset = sum(widths[:i]) + 10
                 cv2.putText(comparison, label, (x_offset, 30),
                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
-            self.save(name, comparison)
+            self._enqueue(name, comparison)
 
         except Exception as e:
             logger.warning(f"Failed to save comparison {name}: {e}")
 
 
+# Process-wide hooks are registered once for all visualizers; a WeakSet keeps
+# them from holding instances alive
+_live_visualizers = weakref.WeakSet()
+
+
+def _reset_writers_after_fork():
+    """A forked worker (e.g. a batch process pool) inherits the queue but not the writer thread, so give it fresh writers"""
+    for visualizer in list(_live_visualizers):
+        visualizer._reset_writer()
+
+
+def _flush_all():
+    """Write out pending debug images before the interpreter exits"""
+    for visualizer in list(_live_visualizers):
+        visualizer.flush()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_writers_after_fork)
+atexit.register(_flush_all)
+
+
 # Global instance - can be enabled via environment variable
 DEBUG_MODE = os.environ.get('DEBUG_VISUALIZATION', 'false').lower() == 'true'
 debug_viz = DebugVisualizer(enabled=DEBUG_MODE)
@@ -5,11 +5,23 @@ Detects doors and openings to understand room connectivity
 
 import cv2
 import numpy as np
+from functools import lru_cache
 from typing import List, Dict, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Perimeter sample angles for arc verification (every 10 degrees)
+_ARC_SAMPLE_ANGLES = np.linspace(0, 2 * np.pi, 36)
+_ARC_SAMPLE_COS = np.cos(_ARC_SAMPLE_ANGLES)
+_ARC_SAMPLE_SIN = np.sin(_ARC_SAMPLE_ANGLES)
+
+
+@lru_cache(maxsize=None)
+def _rect_kernel(size: int) -> np.ndarray:
+    """Rectangular structuring element, built once per size and reused"""
+    return cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+
 
 class DoorwayDetector:
     """
@@ -31,9 +43,20 @@ class DoorwayDetector:
             'gap_detection_kernel': 3, # morphology kernel size
             'min_gap_confidence': 0.6,  # threshold for gap detection (increased)
             'require_room_proximity': True,  # Only keep doorways near rooms
-            'max_doorways_per_room': 6  # Sanity check
+            'max_doorways_per_room': 6,  # Sanity check
+            'arc_detection_scale': 1.0  # <1.0 runs HoughCircles on a downsampled image
         }
 
+        # Resolve per-image parameters once instead of on every detection call
+        scale = self.config.get('arc_detection_scale', 1.0)
+        self._arc_scale = scale if scale < 1.0 else 1.0
+        self._hough_min_dist = 30 * self._arc_scale  # Minimum distance between circle centers
+        self._hough_min_radius = int(self.config['min_arc_radius'] * self._arc_scale)
+        self._hough_max_radius = int(self.config['max_arc_radius'] * self._arc_scale)
+        self._gap_kernel = _rect_kernel(self.config['gap_detection_kernel'])
+        self._min_door_width = self.config['min_door_width']
+        self._max_door_width = self.config['max_door_width']
+
     def detect_doorways(
         self,
         binary_image: np.ndarray,
@@ -97,78 +120,91 @@ class DoorwayDetector:
 
         Door arcs appear as quarter-circles in blueprints showing door swing path
         """
-        # Invert image (arcs are typically drawn as black lines on white)
-        # We want to detect the arc lines themselves
-        inverted = cv2.bitwise_not(binary_image)
-
-        # Use Canny edge detection to find arc edges
-        edges = cv2.Canny(inverted, 50, 150, apertureSize=3)
+        # Optionally search for circles at reduced resolution. HoughCircles
+        # cost scales with pixel count, but thin arc lines blur when
+        # downsampled, so full resolution stays the default.
+        scale = self._arc_scale
+        if scale < 1.0:
+            search_image = cv2.resize(binary_image, None, fx=scale, fy=scale,
+                                      interpolation=cv2.INTER_AREA)
+        else:
+            search_image = binary_image
+
+        # Use Canny edge detection to find arc edges. Canny only looks at
+        # gradient magnitude, so it gives the same edges on the original
+        # image as on its inverse - no need to invert first.
+        edges = cv2.Canny(search_image, 50, 150, apertureSize=3)
 
         # Detect circles (arcs will appear as partial circles)
         circles = cv2.HoughCircles(
             edges,
             cv2.HOUGH_GRADIENT,
             dp=1,
-            minDist=30,  # Minimum distance between circle centers
+            minDist=self._hough_min_dist,
             param1=50,   # Canny edge threshold
             param2=15,   # Accumulator threshold (lower = more permissive)
-            minRadius=self.config['min_arc_radius'],
-            maxRadius=self.config['max_arc_radius']
+            minRadius=self._hough_min_radius,
+            maxRadius=self._hough_max_radius
         )
 
         doorways = []
 
         if circles is not None:
-            circles = np.round(circles[0, :]).astype("int")
-
-            for (x, y, r) in circles:
-                # Verify this is a door arc (not a full circle)
-                # Check if it's a partial arc by examining pixel density
-                is_partial = self._verify_partial_arc(inverted, x, y, r)
-
-                if is_partial:
-                    doorways.append({
-                        'center': [int(x), int(y)],
-                        'radius': int(r),
-                        'type': 'arc',
-                        'confidence': 0.8,  # High confidence for arc detection
-                        'bounding_box': [x - r, y - r, x + r, y + r]
-                    })
+            # Map back to full resolution; arcs are verified on the original image
+            circles = np.round(circles[0, :] / scale).astype("int")
+
+            # Verify which circles are door arcs (not full circles),
+            # examining pixel density for all candidates at once
+            is_partial = self._verify_partial_arcs(binary_image, circles)
+
+            for (x, y, r) in circles[is_partial].tolist():
+                doorways.append({
+                    'center': [x, y],
+                    'radius': r,
+                    'type': 'arc',
+                    'confidence': 0.8,  # High confidence for arc detection
+                    'bounding_box': [x - r, y - r, x + r, y + r]
+                })
 
         return doorways
 
-    def _verify_partial_arc(
+    def _verify_partial_arcs(
         self,
-        edge_image: np.ndarray,
-        cx: int,
-        cy: int,
-        radius: int
-    ) -> bool:
+        binary_image: np.ndarray,
+        circles: np.ndarray
+    ) -> np.ndarray:
         """
-        Verify if detected circle is actually a partial arc (door swing)
+        Verify which detected circles are actually partial arcs (door swings)
 
         Full circles (like tables) should be rejected
         Partial arcs (90-120 degrees) should be accepted
-        """
-        # Sample points around the circle perimeter
-        angles = np.linspace(0, 2 * np.pi, 36)  # Every 10 degrees
-        edge_points = 0
 
-        for angle in angles:
-            x = int(cx + radius * np.cos(angle))
-            y = int(cy + radius * np.sin(angle))
+        Arc lines are the dark (non-white) pixels of the binary image.
+
+        Args:
+            binary_image: Binary blueprint image
+            circles: (N, 3) integer array of (x, y, radius)
+
+        Returns:
+            (N,) boolean mask of circles that look like door arcs
+        """
+        # Sample 36 points around every circle perimeter: (N, 36) coordinates
+        cx, cy, radius = circles[:, 0:1], circles[:, 1:2], circles[:, 2:3]
+        xs = (cx + radius * _ARC_SAMPLE_COS).astype(np.int64)
+        ys = (cy + radius * _ARC_SAMPLE_SIN).astype(np.int64)
 
-            # Check if point is within image bounds
-            if 0 <= y < edge_image.shape[0] and 0 <= x < edge_image.shape[1]:
-                if edge_image[y, x] > 0:
-                    edge_points += 1
+        # Only count points within image bounds
+        height, width = binary_image.shape[:2]
+        in_bounds = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        is_dark = np.zeros(xs.shape, dtype=bool)
+        is_dark[in_bounds] = binary_image[ys[in_bounds], xs[in_bounds]] < 255
 
         # Door arcs typically cover 25-35% of circle (90-126 degrees)
         # Full circles would have >70% coverage
         # Be more strict to avoid detecting furniture/fixtures
-        coverage = edge_points / len(angles)
+        coverage = np.count_nonzero(is_dark, axis=1) / len(_ARC_SAMPLE_ANGLES)
 
-        return 0.20 < coverage < 0.45  # Stricter partial arc range
+        return (coverage > 0.20) & (coverage < 0.45)  # Stricter partial arc range
 
     def _detect_wall_gaps(self, binary_image: np.ndarray) -> List[Dict]:
         """
@@ -179,21 +215,17 @@ class DoorwayDetector:
         2. Find discontinuities (gaps)
         3. Filter by gap size to distinguish doors from windows/other gaps
         """
-        # Create wall skeleton by inverting and thinning
-        inverted = cv2.bitwise_not(binary_image)
-
-        # Apply morphological operations to isolate walls
-        kernel = cv2.getStructuringElement(
-            cv2.MORPH_RECT,
-            (self.config['gap_detection_kernel'], self.config['gap_detection_kernel'])
-        )
-
-        # Erode to find gaps
-        eroded = cv2.erode(inverted, kernel, iterations=1)
+        # Isolate walls: erode the inverted walls to find gaps. Eroding the inverse equals
+        # inverting the dilation, so dilate the original and invert that
+        # buffer in place instead of allocating a separate inverted copy.
+        eroded = cv2.dilate(binary_image, self._gap_kernel, iterations=1)
+        cv2.bitwise_not(eroded, dst=eroded)
 
         # Find contours in eroded image
         contours, _ = cv2.findContours(eroded, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
+        min_door_width = self._min_door_width
+        max_door_width = self._max_door_width
         doorways = []
 
         for contour in contours:
@@ -211,7 +243,7 @@ class DoorwayDetector:
             min_dim = min(w, h)
             max_dim = max(w, h)
 
-            if (self.config['min_door_width'] <= min_dim <= self.config['max_door_width'] and
+            if (min_door_width <= min_dim <= max_door_width and
                 max_dim > min_dim * 1.5):  # Must be elongated
 
                 # Calculate centroid
@@ -246,24 +278,21 @@ class DoorwayDetector:
         # Sort by confidence (highest first)
         doorways.sort(key=lambda d: d['confidence'], reverse=True)
 
-        unique_doorways = []
-
-        for door in doorways:
-            is_duplicate = False
-
-            for existing in unique_doorways:
-                # Calculate distance between centers
-                dist = np.sqrt(
-                    (door['center'][0] - existing['center'][0]) ** 2 +
-                    (door['center'][1] - existing['center'][1]) ** 2
-                )
+        # Pairwise squared center distances, compared once against 20px
+        centers = np.fromiter((d['center'] for d in doorways), dtype=(np.int64, 2), count=len(doorways))
+        deltas = centers[:, None, :] - centers[None, :, :]
+        is_near = np.einsum('ijk,ijk->ij', deltas, deltas) < 20 ** 2
 
-                if dist < 20:  # Within 20 pixels = duplicate
-                    is_duplicate = True
-                    break
+        # Greedy pass in confidence order: a kept doorway suppresses
+        # every lower-confidence doorway within range
+        suppressed = np.zeros(len(doorways), dtype=bool)
+        unique_doorways = []
 
-            if not is_duplicate:
-                unique_doorways.append(door)
+        for i, door in enumerate(doorways):
+            if suppressed[i]:
+                continue
+            unique_doorways.append(door)
+            suppressed |= is_near[i]
 
         return unique_doorways
 
@@ -277,30 +306,34 @@ class DoorwayDetector:
 
         A doorway connects two rooms if it's near their boundary
         """
-        for door in doorways:
-            cx, cy = door['center']
-            adjacent_rooms = []
-
-            # Find rooms whose boundaries are near this doorway
-            for room in rooms:
-                x1, y1, x2, y2 = room['bounding_box']
-
-                # Expand bounding box slightly to catch doorways at edges
-                margin = 10
-                expanded_bbox = [x1 - margin, y1 - margin, x2 + margin, y2 + margin]
-
-                # Check if doorway center is near room boundary
-                if (expanded_bbox[0] <= cx <= expanded_bbox[2] and
-                    expanded_bbox[1] <= cy <= expanded_bbox[3]):
-
-                    # Check if it's actually at boundary (not deep inside room)
-                    at_boundary = (
-                        abs(cx - x1) < margin or abs(cx - x2) < margin or
-                        abs(cy - y1) < margin or abs(cy - y2) < margin
-                    )
-
-                    if at_boundary:
-                        adjacent_rooms.append(room['id'])
+        if not doorways:
+            return doorways
+
+        # Expand bounding boxes slightly to catch doorways at edges
+        margin = 10
+        room_ids = [room['id'] for room in rooms]
+        boxes = np.fromiter((room['bounding_box'] for room in rooms), dtype=(np.float64, 4), count=len(rooms))
+        centers = np.fromiter((door['center'] for door in doorways), dtype=(np.float64, 2), count=len(doorways))
+        cx = centers[:, 0:1]
+        cy = centers[:, 1:2]
+        x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+
+        # (doorways, rooms) matrix: doorway center inside the expanded box...
+        inside = (
+            (x1 - margin <= cx) & (cx <= x2 + margin) &
+            (y1 - margin <= cy) & (cy <= y2 + margin)
+        )
+
+        # ...and actually at the boundary (not deep inside the room)
+        at_boundary = (
+            (np.abs(cx - x1) < margin) | (np.abs(cx - x2) < margin) |
+            (np.abs(cy - y1) < margin) | (np.abs(cy - y2) < margin)
+        )
+
+        adjacency = inside & at_boundary
+
+        for door, row in zip(doorways, adjacency):
+            adjacent_rooms = [room_ids[j] for j in np.flatnonzero(row)]
 
             # A valid doorway should connect 1-2 rooms
             # (1 = entrance, 2 = internal door)
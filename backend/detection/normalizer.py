@@ -6,6 +6,8 @@ Converts pixel coordinates to percentage-based (0.0-1.0) format
 from typing import List, Dict, Tuple
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,78 +28,90 @@ def normalize_coordinates(items: List[Dict], original_shape: Tuple[int, int, ...
 
     logger.info(f"Normalizing coordinates for {len(items)} items (image: {width}x{height})")
 
-    # Convert all numpy types first
-    items = [_convert_numpy_types(item) for item in items]
-
-    for item in items:
-        # Handle rooms (have bounding_box)
-        if 'bounding_box' in item:
-            x_min, y_min, x_max, y_max = item['bounding_box']
-
-            # Normalize to 0.0-1.0 range
-            item['bounding_box_normalized'] = [
-                round(float(x_min) / width, 4),   # x_min
-                round(float(y_min) / height, 4),  # y_min
-                round(float(x_max) / width, 4),   # x_max
-                round(float(y_max) / height, 4)   # y_max
-            ]
+    # Shallow copies so the caller's items are not modified. Detectors emit
+    # native Python values and every normalized field below is built with
+    # .tolist()/int(), so no recursive numpy conversion is needed
+    items = [dict(item) for item in items]
+
+    # Rooms and doorways with a bounding box - normalize all boxes in one pass
+    boxed = [item for item in items if 'bounding_box' in item]
+    if boxed:
+        boxes = np.fromiter((item['bounding_box'] for item in boxed), dtype=(np.float64, 4), count=len(boxed))
+        boxes_normalized = _round_array(boxes / np.array([width, height, width, height]), 4)
+        boxes_rounded = np.array(boxes_normalized, dtype=np.float64)
+        areas_normalized = _round_array(
+            (boxes_rounded[:, 2] - boxes_rounded[:, 0]) *
+            (boxes_rounded[:, 3] - boxes_rounded[:, 1]),
+            6
+        )
+
+        for item, box_normalized, box_pixels, area_normalized in zip(
+            boxed, boxes_normalized, boxes.astype(int).tolist(), areas_normalized
+        ):
+            item['bounding_box_normalized'] = box_normalized
 
             # Keep original pixels for debugging
-            item['bounding_box_pixels'] = [int(x_min), int(y_min), int(x_max), int(y_max)]
-
-            # Normalize polygon coordinates if present
-            if 'polygon' in item:
-                item['polygon_normalized'] = [
-                    [round(float(x) / width, 4), round(float(y) / height, 4)]
-                    for x, y in item['polygon']
-                ]
-                # Keep original pixels for debugging
-                item['polygon_pixels'] = item['polygon']
+            item['bounding_box_pixels'] = box_pixels
 
             # Calculate normalized area for rooms
             if 'area_pixels' not in item or item.get('type') != 'gap':
-                norm_w = item['bounding_box_normalized'][2] - item['bounding_box_normalized'][0]
-                norm_h = item['bounding_box_normalized'][3] - item['bounding_box_normalized'][1]
-                item['area_normalized'] = round(norm_w * norm_h, 6)
-
-        # Handle doorways (have center)
-        if 'center' in item:
-            cx, cy = item['center']
-            item['center_normalized'] = [
-                round(float(cx) / width, 4),
-                round(float(cy) / height, 4)
-            ]
-            item['center_pixels'] = [int(cx), int(cy)]
-
-        # Normalize radius if present (arcs)
-        if 'radius' in item:
-            item['radius_pixels'] = int(item['radius'])
-            # Normalize relative to image width
-            item['radius_normalized'] = round(float(item['radius']) / width, 4)
+                item['area_normalized'] = area_normalized
+
+    # Room polygons - normalize every vertex in one pass, then split per room
+    shaped = [item for item in items if 'bounding_box' in item and 'polygon' in item]
+    if shaped:
+        vertices = np.concatenate(
+            [np.asarray(item['polygon'], dtype=np.float64).reshape(-1, 2) for item in shaped]
+        )
+        vertices_normalized = _round_array(vertices / np.array([width, height]), 4)
+        offsets = np.cumsum([0] + [len(item['polygon']) for item in shaped])
+
+        for item, start, end in zip(shaped, offsets[:-1].tolist(), offsets[1:].tolist()):
+            item['polygon_normalized'] = vertices_normalized[start:end]
+            # Keep original pixels for debugging
+            item['polygon_pixels'] = item['polygon']
+
+    # Doorway centers - normalize all centers in one pass
+    centered = [item for item in items if 'center' in item]
+    if centered:
+        centers = np.fromiter((item['center'] for item in centered), dtype=(np.float64, 2), count=len(centered))
+        centers_normalized = _round_array(centers / np.array([width, height]), 4)
+
+        for item, center_normalized, center_pixels in zip(
+            centered, centers_normalized, centers.astype(int).tolist()
+        ):
+            item['center_normalized'] = center_normalized
+            item['center_pixels'] = center_pixels
+
+    # Arc radii - normalized relative to image width
+    arcs = [item for item in items if 'radius' in item]
+    if arcs:
+        radii = np.fromiter((item['radius'] for item in arcs), dtype=np.float64, count=len(arcs))
+        radii_normalized = _round_array(radii / width, 4)
+
+        for item, radius_normalized, radius_pixels in zip(
+            arcs, radii_normalized, radii.astype(int).tolist()
+        ):
+            item['radius_pixels'] = radius_pixels
+            item['radius_normalized'] = radius_normalized
 
     logger.info("Coordinate normalization complete")
 
     return items
 
 
-def _convert_numpy_types(obj):
+def _round_array(values: np.ndarray, ndigits: int) -> list:
     """
-    Recursively convert numpy types to Python native types for JSON serialization
+    Round a float64 array to nested Python lists with the built-in round()
+
+    np.round scales, rounds and unscales, which can land one unit off from
+    round() in the last digit (e.g. 0.175023 vs 0.175024). The division is
+    still vectorized; only the rounding runs per element, to keep the API
+    output identical.
     """
-    import numpy as np
-
-    if isinstance(obj, dict):
-        return {k: _convert_numpy_types(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [_convert_numpy_types(item) for item in obj]
-    elif isinstance(obj, (np.integer, np.int64, np.int32, np.int16, np.int8)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float64, np.float32)):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    else:
-        return obj
+    if values.ndim > 1:
+        return [_round_array(row, ndigits) for row in values]
+    return [round(value, ndigits) for value in values.tolist()]
 
 
 def denormalize_coordinates(
@@ -131,3 +145,32 @@ def denormalize_coordinates(
         'width': width,
         'height': height
     }
+
+
+def denormalize_many(
+    normalized_boxes,
+    target_width: int,
+    target_height: int
+) -> np.ndarray:
+    """
+    Batch version of denormalize_coordinates for many boxes at once
+
+    Args:
+        normalized_boxes: (N, 4) array-like of [x_min, y_min, x_max, y_max] in 0.0-1.0 range
+        target_width: Target canvas width in pixels
+        target_height: Target canvas height in pixels
+
+    Returns:
+        (N, 4) integer array of [x, y, width, height] in pixels, matching
+        denormalize_coordinates row for row
+    """
+    boxes = np.asarray(normalized_boxes, dtype=np.float64).reshape(-1, 4)
+
+    pixels = np.empty((len(boxes), 4), dtype=np.float64)
+    pixels[:, 0] = boxes[:, 0] * target_width
+    pixels[:, 1] = boxes[:, 1] * target_height
+    pixels[:, 2] = (boxes[:, 2] - boxes[:, 0]) * target_width
+    pixels[:, 3] = (boxes[:, 3] - boxes[:, 1]) * target_height
+
+    # astype truncates toward zero, same as int()
+    return pixels.astype(np.int64)
@@ -7,6 +7,7 @@ import cv2
 import numpy as np
 from typing import List, Dict
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -17,10 +18,27 @@ DETECTION_CONFIG = {
     'min_room_area_pixels': 1500,
     'max_rooms': 50,
     'iou_threshold': 0.7,
-    'hallway_aspect_ratio': 4.0
+    'hallway_aspect_ratio': 4.0,
+    'use_opencl': False,  # Run Canny through OpenCL (T-API) when a device is available
+    'use_cuda': False     # Run Canny on an NVIDIA GPU when OpenCV is built with CUDA
 }
 
 
+@lru_cache(maxsize=1)
+def _cuda_available() -> bool:
+    """Whether this OpenCV build has CUDA and can see a device (checked once)"""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+
+@lru_cache(maxsize=None)
+def _cuda_canny_detector(low_threshold: float, high_threshold: float):
+    """Build the CUDA Canny detector once per threshold pair"""
+    return cv2.cuda.createCannyEdgeDetector(low_threshold, high_threshold, 3)
+
+
 def detect_rooms_opencv(preprocessed: dict) -> List[Dict]:
     """
     Detect room boundaries using OpenCV contour detection
@@ -41,12 +59,27 @@ def detect_rooms_opencv(preprocessed: dict) -> List[Dict]:
 
     # STEP 1: Edge Detection (2s)
     logger.info("Step 1: Edge detection")
-    edges = cv2.Canny(
-        image,
-        threshold1=DETECTION_CONFIG['canny_low_threshold'],
-        threshold2=DETECTION_CONFIG['canny_high_threshold'],
-        apertureSize=3
-    )
+    # On a GPU (CUDA) or OpenCL device only the finished edge map is
+    # downloaded for contour tracing
+    if DETECTION_CONFIG['use_cuda'] and _cuda_available():
+        logger.info("Using CUDA for edge detection")
+        gpu_image = cv2.cuda_GpuMat()
+        gpu_image.upload(image)
+        detector = _cuda_canny_detector(
+            DETECTION_CONFIG['canny_low_threshold'],
+            DETECTION_CONFIG['canny_high_threshold']
+        )
+        edges = detector.detect(gpu_image).download()
+    else:
+        use_opencl = DETECTION_CONFIG['use_opencl'] and cv2.ocl.haveOpenCL()
+        edges = cv2.Canny(
+            cv2.UMat(image) if use_opencl else image,
+            threshold1=DETECTION_CONFIG['canny_low_threshold'],
+            threshold2=DETECTION_CONFIG['canny_high_threshold'],
+            apertureSize=3
+        )
+        if use_opencl:
+            edges = edges.get()
 
     # STEP 2: Find Contours (3s)
     logger.info("Step 2: Finding contours")
@@ -61,22 +94,24 @@ def detect_rooms_opencv(preprocessed: dict) -> List[Dict]:
     # STEP 3: Filter by Size (2s)
     logger.info("Step 3: Filtering by size")
     min_area = DETECTION_CONFIG['min_room_area_pixels']
-    valid_contours = [
-        c for c in contours
-        if cv2.contourArea(c) > min_area
-    ]
+
+    # Compute each contour's area once and carry it into STEP 4
+    valid_contours = []
+    for c in contours:
+        area = cv2.contourArea(c)
+        if area > min_area:
+            valid_contours.append((c, area))
 
     logger.info(f"Filtered to {len(valid_contours)} valid contours (min area: {min_area})")
 
     # STEP 4: Get Bounding Boxes (5s)
     logger.info("Step 4: Extracting bounding boxes")
     rooms = []
-    for idx, contour in enumerate(valid_contours):
+    for idx, (contour, area) in enumerate(valid_contours):
         # Get bounding rectangle
         x, y, w, h = cv2.boundingRect(contour)
 
         # Calculate confidence based on shape regularity
-        area = cv2.contourArea(contour)
         bbox_area = w * h
         confidence = area / bbox_area if bbox_area > 0 else 0
 
@@ -100,8 +135,9 @@ def detect_rooms_opencv(preprocessed: dict) -> List[Dict]:
 
     logger.info(f"After duplicate removal: {len(rooms)} rooms")
 
-    # STEP 6: Sort by area (largest first)
-    rooms.sort(key=lambda r: r['area_pixels'], reverse=True)
+    # STEP 6: Sort by area (largest first), ties keep their order
+    areas = np.fromiter((r['area_pixels'] for r in rooms), dtype=np.int64, count=len(rooms))
+    rooms = [rooms[i] for i in np.argsort(-areas, kind='stable').tolist()]
 
     # Limit to max rooms
     max_rooms = DETECTION_CONFIG['max_rooms']
@@ -128,29 +164,20 @@ def remove_duplicates(rooms: List[Dict], iou_threshold: float = 0.7) -> List[Dic
     if len(rooms) <= 1:
         return rooms
 
-    # Sort by confidence score (keep higher confidence rooms)
-    rooms_sorted = sorted(rooms, key=lambda r: r['confidence_score'], reverse=True)
-
-    keep = []
-    skip_indices = set()
-
-    for i, room1 in enumerate(rooms_sorted):
-        if i in skip_indices:
-            continue
-
-        keep.append(room1)
-
-        # Check against remaining rooms
-        for j in range(i + 1, len(rooms_sorted)):
-            if j in skip_indices:
-                continue
+    # Non-maximum suppression in OpenCV: visits rooms by descending
+    # confidence (ties keep their input order) and drops every room whose
+    # IoU with an already kept room exceeds the threshold
+    boxes = [
+        [x_min, y_min, x_max - x_min, y_max - y_min]
+        for x_min, y_min, x_max, y_max in (r['bounding_box'] for r in rooms)
+    ]
 
-            room2 = rooms_sorted[j]
-            iou = calculate_iou(room1['bounding_box'], room2['bounding_box'])
+    # NMSBoxes discards scores <= score_threshold (which must be >= 0),
+    # so shift scores up by 1 to keep rooms with 0.0 confidence
+    scores = [1.0 + r['confidence_score'] for r in rooms]
 
-            if iou > iou_threshold:
-                skip_indices.add(j)
-                logger.debug(f"Removing duplicate: IoU={iou:.2f} between {room1['id']} and {room2['id']}")
+    keep_indices = cv2.dnn.NMSBoxes(boxes, scores, score_threshold=0.0, nms_threshold=iou_threshold)
+    keep = [rooms[i] for i in np.asarray(keep_indices, dtype=np.int64).reshape(-1)]
 
     logger.info(f"Removed {len(rooms) - len(keep)} duplicate rooms")
     return keep
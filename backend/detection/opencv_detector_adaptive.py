@@ -5,14 +5,17 @@ Automatically adjusts parameters based on blueprint characteristics
 
 import cv2
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict
 import logging
 
-from detection.blueprint_analyzer import analyze_blueprint_characteristics, get_scale_context
+from detection.blueprint_analyzer import analyze_blueprint_characteristics, get_scale_context_from_areas
 from detection.opencv_detector_improved import (
     extract_rooms_from_hierarchy,
     filter_by_room_characteristics,
-    remove_duplicates,
+    ContourFeatures,
+    RoomBatch,
+    nms_indices,
     calculate_iou,
     DETECTION_CONFIG
 )
@@ -22,84 +25,84 @@ from detection.doorway_detector import detect_doorways
 logger = logging.getLogger(__name__)
 
 
-def calculate_room_confidence_score(contour, bounding_box, style: str) -> tuple:
+# VARIABLE WEIGHTING based on blueprint style
+# (solidity, extent, aspect_ratio, size) weights for confidence scoring
+_CAD_WEIGHTS = (0.1, 0.2, 0.5, 0.2)            # solidity/extent unreliable due to hollow outlines
+_LINE_DRAWING_WEIGHTS = (0.3, 0.3, 0.3, 0.1)   # shapes should be clean, solidity matters
+_BALANCED_WEIGHTS = (0.25, 0.25, 0.3, 0.2)     # mixed_style, scanned
+
+STYLE_WEIGHTS = {
+    'clean_cad': _CAD_WEIGHTS,
+    'detailed_cad': _CAD_WEIGHTS,
+    'simple_line_drawing': _LINE_DRAWING_WEIGHTS,
+    'detailed_line_drawing': _LINE_DRAWING_WEIGHTS,
+    'mixed_style': _BALANCED_WEIGHTS,
+    'scanned': _BALANCED_WEIGHTS,
+}
+
+
+def get_style_weights(style: str) -> tuple:
+    """Look up confidence weights for a blueprint style (balanced if unknown)"""
+    return STYLE_WEIGHTS.get(style, _BALANCED_WEIGHTS)
+
+
+def calculate_room_confidence_scores(areas: np.ndarray, hull_areas: np.ndarray,
+                                     widths: np.ndarray, heights: np.ndarray,
+                                     weights: tuple) -> tuple:
     """
-    Calculate weighted confidence score for a room candidate
+    Calculate weighted confidence scores for a batch of room candidates
 
-    Returns: (score, metrics_dict)
+    Returns: (scores, metrics_dict) where every metric is an array
 
     Instead of hard thresholds, this uses weighted scoring where
-    different metrics matter more/less depending on blueprint style
+    different metrics matter more/less depending on blueprint style.
+    Look weights up once per image with get_style_weights().
     """
-    x, y, w, h = bounding_box
+    areas = np.asarray(areas, dtype=np.float64)
+    hull_areas = np.asarray(hull_areas, dtype=np.float64)
+    widths = np.asarray(widths, dtype=np.float64)
+    heights = np.asarray(heights, dtype=np.float64)
 
     # Calculate all metrics
-    hull = cv2.convexHull(contour)
-    hull_area = cv2.contourArea(hull)
-    contour_area = cv2.contourArea(contour)
-
-    solidity = contour_area / hull_area if hull_area > 0 else 0
+    solidity = np.divide(areas, hull_areas, out=np.zeros_like(areas), where=hull_areas > 0)
 
-    bbox_area = w * h
-    extent = contour_area / bbox_area if bbox_area > 0 else 0
+    bbox_areas = widths * heights
+    extent = np.divide(areas, bbox_areas, out=np.zeros_like(areas), where=bbox_areas > 0)
 
-    aspect_ratio = max(w, h) / min(w, h) if min(w, h) > 0 else float('inf')
+    short_side = np.minimum(widths, heights)
+    aspect_ratio = np.divide(
+        np.maximum(widths, heights), short_side,
+        out=np.full_like(areas, np.inf), where=short_side > 0
+    )
 
     # Normalize aspect ratio to 0-1 score (1.0 = perfect square, decreases as ratio increases)
     # Good range: 1:1 to 3:1, acceptable up to 8:1
-    if aspect_ratio <= 3:
-        aspect_score = 1.0
-    elif aspect_ratio <= 8:
-        aspect_score = 1.0 - ((aspect_ratio - 3) / 5) * 0.5  # Decays to 0.5
-    else:
-        aspect_score = 0.0  # Too elongated
+    aspect_score = np.where(
+        aspect_ratio <= 3, 1.0,
+        np.where(aspect_ratio <= 8, 1.0 - ((aspect_ratio - 3) / 5) * 0.5, 0.0)  # Decays to 0.5
+    )
 
     # Normalize solidity (already 0-1, but clip low values)
-    solidity_score = min(solidity, 1.0)
+    solidity_score = np.minimum(solidity, 1.0)
 
     # Normalize extent (already 0-1)
-    extent_score = min(extent, 1.0)
+    extent_score = np.minimum(extent, 1.0)
 
     # Size score (relative to expected room size)
     # Assume rooms are 5000-100000 pixels, ideal around 20000
-    size_score = 1.0 if 5000 < contour_area < 100000 else 0.5
-
-    # VARIABLE WEIGHTING based on blueprint style
-    if style in ['clean_cad', 'detailed_cad']:
-        # CAD blueprints: solidity/extent unreliable due to hollow outlines
-        # Rely more on aspect ratio and size
-        weights = {
-            'solidity': 0.1,
-            'extent': 0.2,
-            'aspect_ratio': 0.5,
-            'size': 0.2
-        }
-    elif style in ['simple_line_drawing', 'detailed_line_drawing']:
-        # Line drawings: shapes should be clean, solidity matters
-        weights = {
-            'solidity': 0.3,
-            'extent': 0.3,
-            'aspect_ratio': 0.3,
-            'size': 0.1
-        }
-    else:  # mixed_style, scanned
-        # Balanced weighting
-        weights = {
-            'solidity': 0.25,
-            'extent': 0.25,
-            'aspect_ratio': 0.3,
-            'size': 0.2
-        }
+    size_score = np.where((areas > 5000) & (areas < 100000), 1.0, 0.5)
 
     # Calculate weighted score
-    score = (
-        weights['solidity'] * solidity_score +
-        weights['extent'] * extent_score +
-        weights['aspect_ratio'] * aspect_score +
-        weights['size'] * size_score
+    w_solidity, w_extent, w_aspect, w_size = weights
+    scores = (
+        w_solidity * solidity_score +
+        w_extent * extent_score +
+        w_aspect * aspect_score +
+        w_size * size_score
     )
 
     metrics = {
+        'area': areas,
         'solidity': solidity,
         'extent': extent,
         'aspect_ratio': aspect_ratio,
@@ -107,10 +110,10 @@ def calculate_room_confidence_score(contour, bounding_box, style: str) -> tuple:
         'extent_score': extent_score,
         'aspect_score': aspect_score,
         'size_score': size_score,
-        'final_score': score
+        'final_score': scores
     }
 
-    return score, metrics
+    return scores, metrics
 
 
 def detect_rooms_adaptive(preprocessed: dict) -> List[Dict]:
@@ -123,7 +126,8 @@ def detect_rooms_adaptive(preprocessed: dict) -> List[Dict]:
     - Handles thin walls, thick walls, detailed drawings, simple drawings
 
     Args:
-        preprocessed: Dictionary from preprocess_pipeline containing 'processed' image
+        preprocessed: Dictionary from preprocess_pipeline containing 'processed' image.
+            The blueprint analysis is cached on it under 'detection_analysis'.
 
     Returns:
         List of detected rooms with bounding boxes
@@ -133,8 +137,18 @@ def detect_rooms_adaptive(preprocessed: dict) -> List[Dict]:
     logger.info(f"Starting ADAPTIVE detection on image shape: {image.shape}")
 
     # STEP 0: Analyze blueprint characteristics (NEW!)
-    logger.info("Step 0: Analyzing blueprint characteristics")
-    analysis = analyze_blueprint_characteristics(image)
+    # The result is stored back on the preprocessed dict so repeated runs on
+    # the same image (tuning, comparisons, retries) skip the analysis. This is
+    # separate from preprocessed['analysis'], which describes the grayscale
+    # input rather than the binary image detection works on.
+    cached = preprocessed.get('detection_analysis')
+    if cached is not None and cached[0] is image:
+        logger.info("Step 0: Reusing cached blueprint analysis")
+        analysis = cached[1]
+    else:
+        logger.info("Step 0: Analyzing blueprint characteristics")
+        analysis = analyze_blueprint_characteristics(image)
+        preprocessed['detection_analysis'] = (image, analysis)
 
     # Get adaptive parameters
     adaptive_params = analysis['recommended_params']
@@ -159,18 +173,26 @@ def detect_rooms_adaptive(preprocessed: dict) -> List[Dict]:
         logger.warning("No contours found")
         return []
 
+    # Areas, hulls and boxes are computed once per contour and shared by the
+    # steps below
+    features = ContourFeatures(contours)
+
     # STEP 2: Extract Candidate Rooms Using Hierarchy
     logger.info("Step 2: Extracting rooms using hierarchical analysis")
-    candidate_rooms = extract_rooms_from_hierarchy(contours, hierarchy[0])
+    candidate_rooms = extract_rooms_from_hierarchy(
+        contours, hierarchy[0], features.areas(np.arange(len(contours)))
+    )
 
     logger.info(f"Found {len(candidate_rooms)} candidate rooms from hierarchy")
 
     # FALLBACK: If hierarchy found few rooms, supplement with contour-based approach
     if len(candidate_rooms) < 3:
         logger.warning(f"Hierarchy found only {len(candidate_rooms)} rooms - using HYBRID approach")
-        size_based_rooms = extract_rooms_by_size(contours, config)
-        # Merge and deduplicate
-        candidate_rooms = list(set(candidate_rooms + size_based_rooms))
+        size_based_rooms = extract_rooms_by_size(contours, config, features)
+        # Merge and deduplicate (sorted contour order keeps room ids reproducible)
+        candidate_rooms = np.unique(
+            np.array(candidate_rooms + size_based_rooms, dtype=np.int64)
+        ).tolist()
         logger.info(f"After hybrid approach: {len(candidate_rooms)} candidate rooms")
 
     # STEP 3: Filter by Size and Shape (using SCORE-BASED filtering)
@@ -179,83 +201,93 @@ def detect_rooms_adaptive(preprocessed: dict) -> List[Dict]:
         candidate_rooms,
         contours,
         config,
-        analysis['style']  # Pass style for variable weighting
+        analysis['style'],  # Pass style for variable weighting
+        features
     )
 
     logger.info(f"After filtering: {len(valid_rooms)} valid rooms")
 
-    # STEP 4: Extract Bounding Boxes and Polygons
-    logger.info("Step 4: Extracting bounding boxes and polygon shapes")
-    rooms = []
-    for idx, contour_idx in enumerate(valid_rooms):
-        contour = contours[contour_idx]
-        x, y, w, h = cv2.boundingRect(contour)
-
-        area = cv2.contourArea(contour)
-        confidence, _ = calculate_room_confidence_score(contour, (x, y, w, h), analysis['style'])
-
-        aspect_ratio = max(w, h) / min(w, h) if min(w, h) > 0 else 1
-        type_hint = 'hallway' if aspect_ratio > config['hallway_aspect_ratio'] else 'room'
+    # STEP 4: Extract Bounding Boxes (polygons wait until duplicates are gone)
+    logger.info("Step 4: Extracting bounding boxes")
+    num_rooms = len(valid_rooms)
+    weights = get_style_weights(analysis['style'])
+    bboxes = np.empty((num_rooms, 4), dtype=np.int64)
+    areas = np.empty(num_rooms, dtype=np.int64)
+    confidences = np.empty(num_rooms, dtype=np.float64)
+    type_hints = np.empty(num_rooms, dtype=object)
+    polygons = np.empty(num_rooms, dtype=object)
+
+    if num_rooms:
+        x, y, w, h = features.bounding_rects(valid_rooms).T
+        area_values = features.areas(valid_rooms)
+        scores, _ = calculate_room_confidence_scores(
+            area_values, features.hull_areas(valid_rooms), w, h, weights
+        )
 
-        # Simplify contour polygon for more manageable point count
-        # Douglas-Peucker algorithm with epsilon = 0.5% of perimeter
-        epsilon = 0.005 * cv2.arcLength(contour, True)
-        simplified_contour = cv2.approxPolyDP(contour, epsilon, True)
+        bboxes[:] = np.stack((x, y, x + w, y + h), axis=1)
+        areas[:] = area_values.astype(np.int64)
+        confidences[:] = [round(score, 2) for score in scores.tolist()]
 
-        # Convert to list of [x, y] points
-        polygon = simplified_contour.reshape(-1, 2).tolist()
+        aspect_ratios = np.maximum(w, h) / np.maximum(np.minimum(w, h), 1)
+        type_hints[:] = np.where(
+            aspect_ratios > config['hallway_aspect_ratio'], 'hallway', 'room'
+        ).tolist()
 
-        rooms.append({
-            'id': f'room_{idx:03d}',
-            'bounding_box': [x, y, x + w, y + h],
-            'polygon': polygon,  # NEW: actual room shape
-            'confidence_score': round(confidence, 2),
-            'type_hint': type_hint,
-            'area_pixels': int(area)
-        })
+    rooms = RoomBatch(
+        np.arange(num_rooms), bboxes, areas, confidences, type_hints,
+        contour_indices=np.asarray(valid_rooms, dtype=np.int64), polygons=polygons
+    )
 
     # STEP 5: Scale-based filtering (NEW!)
     logger.info("Step 5: Applying scale-based filtering")
     if len(rooms) > 3:  # Need enough rooms to establish scale context
-        scale_context = get_scale_context(image, rooms)
+        scale_context = get_scale_context_from_areas(rooms.areas)
 
         # Filter out rooms that are too small compared to others
         # (This catches beds/furniture that passed earlier filters)
-        rooms_filtered = [
-            r for r in rooms
-            if r['area_pixels'] >= scale_context['outlier_threshold']
-        ]
+        reasonable = rooms.areas >= scale_context['outlier_threshold']
 
-        if len(rooms_filtered) < len(rooms):
-            logger.info(f"Scale filtering removed {len(rooms) - len(rooms_filtered)} outliers")
-            rooms = rooms_filtered
+        if not reasonable.all():
+            logger.info(f"Scale filtering removed {len(rooms) - np.count_nonzero(reasonable)} outliers")
+            rooms = rooms[reasonable]
 
     # STEP 6: Remove Overlapping Rooms
     logger.info("Step 6: Removing overlapping duplicates")
-    rooms = remove_duplicates(rooms, iou_threshold=config['iou_threshold'])
+    if len(rooms) > 1:
+        num_before = len(rooms)
+        rooms = rooms[nms_indices(rooms.bboxes, rooms.confidences, config['iou_threshold'])]
+        logger.info(f"Removed {num_before - len(rooms)} duplicate rooms")
 
     logger.info(f"After duplicate removal: {len(rooms)} rooms")
 
-    # STEP 7: Sort and limit
-    rooms.sort(key=lambda r: r['area_pixels'], reverse=True)
+    # STEP 7: Sort (largest first, ties keep their order) and limit
+    rooms = rooms[np.argsort(-rooms.areas, kind='stable')]
 
     max_rooms = config['max_rooms']
     if len(rooms) > max_rooms:
         logger.warning(f"Truncating from {len(rooms)} to {max_rooms} rooms")
         rooms = rooms[:max_rooms]
 
+    # STEP 7.5: Simplify polygons for the surviving rooms only
+    logger.info("Step 7.5: Extracting polygon shapes")
+    for idx, contour_idx in enumerate(rooms.contour_indices.tolist()):
+        contour = contours[contour_idx]
+
+        # Simplify contour polygon for more manageable point count
+        # Douglas-Peucker algorithm with epsilon = 0.5% of perimeter
+        perimeter = cv2.arcLength(contour, True)
+        simplified_contour = cv2.approxPolyDP(contour, 0.005 * perimeter, True)
+        rooms.polygons[idx] = simplified_contour.reshape(-1, 2).tolist()  # actual room shape
+
     logger.info(f"ADAPTIVE detection complete: {len(rooms)} rooms detected")
 
+    rooms = rooms.to_dicts(detection_mode='adaptive', blueprint_style=analysis['style'])
+
     # STEP 8: Detect Doorways (NEW!)
     logger.info("Step 8: Detecting doorways")
     doorways = detect_doorways(image, rooms)
     logger.info(f"Detected {len(doorways)} doorways")
 
-    # Add metadata about detection
-    for room in rooms:
-        room['detection_mode'] = 'adaptive'
-        room['blueprint_style'] = analysis['style']
-
     # Debug visualization - save final result
     debug_viz.save_with_bboxes('4_final_detection', image, rooms)
 
@@ -266,7 +298,43 @@ def detect_rooms_adaptive(preprocessed: dict) -> List[Dict]:
     }
 
 
-def extract_rooms_by_size(contours: List, config: Dict) -> List[int]:
+def _init_batch_worker():
+    """Keep each worker's OpenCV single-threaded so processes don't oversubscribe cores"""
+    cv2.setNumThreads(1)
+
+
+def _detect_and_flush(preprocessed: dict):
+    """Worker entry point: pool workers exit without running atexit, so flush debug writes here"""
+    try:
+        return detect_rooms_adaptive(preprocessed)
+    finally:
+        debug_viz.flush()
+
+
+def detect_rooms_batch(preprocessed_list: List[dict], max_workers: int = None) -> List:
+    """
+    Run adaptive detection on several preprocessed images in parallel
+
+    Images are independent, so each one is handed to a separate worker
+    process (sidestepping the GIL for the Python-side loops).
+
+    Args:
+        preprocessed_list: Dictionaries from preprocess_pipeline_adaptive
+        max_workers: Worker process count (defaults to the CPU count)
+
+    Returns:
+        detect_rooms_adaptive results, in the same order as the inputs
+    """
+    if len(preprocessed_list) <= 1 or max_workers == 1:
+        return [detect_rooms_adaptive(preprocessed) for preprocessed in preprocessed_list]
+
+    logger.info(f"Running batch detection on {len(preprocessed_list)} images")
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_batch_worker) as executor:
+        return list(executor.map(_detect_and_flush, preprocessed_list))
+
+
+def extract_rooms_by_size(contours: List, config: Dict,
+                          features: ContourFeatures = None) -> List[int]:
     """
     Fallback: Extract room candidates based on size alone (no hierarchy)
 
@@ -276,6 +344,7 @@ def extract_rooms_by_size(contours: List, config: Dict) -> List[int]:
     Args:
         contours: All detected contours
         config: Detection configuration
+        features: Shared measurement cache for contours (created if omitted)
 
     Returns:
         List of indices for contours that match room size criteria
@@ -285,12 +354,27 @@ def extract_rooms_by_size(contours: List, config: Dict) -> List[int]:
     min_area = config['min_room_area_pixels']
     max_area = config['max_room_area_pixels']
 
-    for idx in range(len(contours)):
-        area = cv2.contourArea(contours[idx])
+    if len(contours) == 0:
+        logger.info("Fallback size-based extraction found 0 candidates")
+        return room_candidates
+
+    # A contour's area can't exceed the area of its bounding box, so get
+    # every box in one vectorized pass and only compute the exact area for
+    # contours whose box is large enough
+    if features is None:
+        features = ContourFeatures(contours)
+    rects = features.bounding_rects(np.arange(len(contours)))
+    box_areas = rects[:, 2] * rects[:, 3]
 
-        if min_area < area < max_area:
-            room_candidates.append(idx)
-            logger.info(f"Size-based candidate {idx}: area={area}")
+    large = np.flatnonzero(box_areas > min_area)
+    large_areas = features.areas(large)
+    in_range = (large_areas > min_area) & (large_areas < max_area)
+    room_candidates = large[in_range].tolist()
+
+    # Per-contour details only at DEBUG; skip formatting them otherwise
+    if logger.isEnabledFor(logging.DEBUG):
+        for idx, area in zip(room_candidates, large_areas[in_range].tolist()):
+            logger.debug(f"Size-based candidate {idx}: area={area}")
 
     logger.info(f"Fallback size-based extraction found {len(room_candidates)} candidates")
     return room_candidates
@@ -300,52 +384,65 @@ def filter_by_room_characteristics_adaptive(
     candidate_indices: List[int],
     contours: List,
     config: Dict,
-    style: str
+    style: str,
+    features: ContourFeatures = None
 ) -> List[int]:
     """
     Filter using SCORE-BASED approach with variable weighting
 
     Instead of hard thresholds, calculates weighted confidence score
-    Different metrics weighted differently based on blueprint style
+    Different metrics weighted differently based on blueprint style.
+    Pass the detector's ContourFeatures to reuse measurements.
     """
 
-    valid_rooms = []
     # LOWERED from 0.5 to 0.3 based on ground truth analysis
     # Baseline showed severe under-detection (only 36/78 rooms found)
     min_score_threshold = 0.3
+    weights = get_style_weights(style)
 
-    for idx in candidate_indices:
-        contour = contours[idx]
-
-        # Get bounding rectangle
-        x, y, w, h = cv2.boundingRect(contour)
-
-        # HARD FILTER 1: Minimum dimensions (still enforce this)
-        min_dim = config.get('min_room_dimension', 50)
-        if w < min_dim or h < min_dim:
-            logger.info(f"Rejected {idx}: too small ({w}x{h})")
-            continue
-
-        # SCORE-BASED FILTERING
-        score, metrics = calculate_room_confidence_score(
-            contour,
-            (x, y, w, h),
-            style
-        )
+    if len(candidate_indices) == 0:
+        return []
 
-        if score < min_score_threshold:
-            logger.info(
-                f"Rejected {idx}: low score {score:.2f} "
-                f"(solidity={metrics['solidity']:.2f}, extent={metrics['extent']:.2f}, "
-                f"aspect={metrics['aspect_ratio']:.2f})"
+    # Pass 1: measure every candidate into flat arrays
+    if features is None:
+        features = ContourFeatures(contours)
+    rects = features.bounding_rects(candidate_indices)
+    widths, heights = rects[:, 2], rects[:, 3]
+
+    # HARD FILTER 1: Minimum dimensions (still enforce this)
+    min_dim = config.get('min_room_dimension', 50)
+    big_enough = (widths >= min_dim) & (heights >= min_dim)
+
+    # Pass 2: SCORE-BASED FILTERING, vectorized over the candidates that
+    # passed the hard filter (hulls are only built for those)
+    sized = np.flatnonzero(big_enough)
+    sized_indices = [candidate_indices[i] for i in sized]
+    scores, metrics = calculate_room_confidence_scores(
+        features.areas(sized_indices), features.hull_areas(sized_indices),
+        widths[sized], heights[sized], weights
+    )
+    accepted = big_enough.copy()
+    accepted[sized] = scores >= min_score_threshold
+    valid_rooms = [candidate_indices[i] for i in np.flatnonzero(accepted).tolist()]
+
+    # Per-candidate details only at DEBUG; skip formatting them otherwise
+    if logger.isEnabledFor(logging.DEBUG):
+        score_slot = np.full(len(candidate_indices), -1, dtype=np.int64)
+        score_slot[sized] = np.arange(len(sized))
+
+        for i, idx in enumerate(candidate_indices):
+            if not big_enough[i]:
+                logger.debug(f"Rejected {idx}: too small ({widths[i]}x{heights[i]})")
+                continue
+
+            j = score_slot[i]
+            details = (
+                f"(solidity={metrics['solidity'][j]:.2f}, extent={metrics['extent'][j]:.2f}, "
+                f"aspect={metrics['aspect_ratio'][j]:.2f}"
             )
-            continue
-
-        valid_rooms.append(idx)
-        logger.info(
-            f"Accepted {idx}: score={score:.2f} "
-            f"(solidity={metrics['solidity']:.2f}, extent={metrics['extent']:.2f}, "
-            f"aspect={metrics['aspect_ratio']:.2f}, area={cv2.contourArea(contour):.0f})"
-        )
+            if accepted[i]:
+                logger.debug(f"Accepted {idx}: score={scores[j]:.2f} {details}, area={metrics['area'][j]:.0f})")
+            else:
+                logger.debug(f"Rejected {idx}: low score {scores[j]:.2f} {details})")
 
     return valid_rooms
@@ -6,6 +6,7 @@ Key improvement: Analyzes parent-child relationships to find enclosed spaces (ro
 
 import cv2
 import numpy as np
+from dataclasses import dataclass, fields
 from typing import List, Dict, Tuple
 import logging
 
@@ -33,10 +34,129 @@ DETECTION_CONFIG = {
 
     # Duplicate removal
     'iou_threshold': 0.5,              # Stricter than before
-    'max_rooms': 50
+    'max_rooms': 50,
+
+    # Trace contours at this fraction of the working resolution (nearest
+    # neighbour), then map them back up. 0.5 traces ~4x fewer pixels but can
+    # break 1px walls, which changes the contour tree
+    'contour_scale': 1.0
 }
 
 
+@dataclass
+class RoomBatch:
+    """
+    Room candidates held as parallel arrays, one entry per room
+
+    Deduplication, sorting and truncation work on whole arrays; the
+    list-of-dicts format callers expect is only built by to_dicts().
+    Detectors that return polygons fill them in once the final set of
+    rooms is known; without polygons the 'polygon' key is left out.
+    """
+    ids: np.ndarray          # (N,) int - number used for the 'room_XXX' id
+    bboxes: np.ndarray       # (N, 4) int - [x_min, y_min, x_max, y_max]
+    areas: np.ndarray        # (N,) int - contour area in pixels
+    confidences: np.ndarray  # (N,) float - rounded confidence score
+    type_hints: np.ndarray   # (N,) object - 'room' or 'hallway'
+    contour_indices: np.ndarray = None  # (N,) int - source contour in the findContours output
+    polygons: np.ndarray = None         # (N,) object - simplified [x, y] point lists
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index) -> 'RoomBatch':
+        """Select rooms with a boolean mask, index array or slice"""
+        return RoomBatch(*(
+            None if value is None else value[index]
+            for value in (getattr(self, f.name) for f in fields(self))
+        ))
+
+    def to_dicts(self, **metadata) -> List[Dict]:
+        """Materialize rooms in the detector output format"""
+        rooms = []
+        for i, (room_id, bbox, confidence, type_hint, area) in enumerate(zip(
+            self.ids.tolist(), self.bboxes.tolist(), self.confidences.tolist(),
+            self.type_hints, self.areas.tolist()
+        )):
+            room = {'id': f'room_{room_id:03d}', 'bounding_box': bbox}
+            if self.polygons is not None:
+                room['polygon'] = self.polygons[i]
+            room.update(confidence_score=confidence, type_hint=type_hint, area_pixels=area, **metadata)
+            rooms.append(room)
+        return rooms
+
+
+def contour_bounding_rects(contours: List, indices) -> np.ndarray:
+    """
+    Bounding rectangles for the selected contours in one vectorized pass
+
+    Equivalent to calling cv2.boundingRect on each contour, but the points
+    are concatenated and reduced per contour instead of paying a Python to
+    C round-trip for every (typically ~10 point) contour.
+
+    Returns: (N, 4) int64 array of [x, y, w, h] aligned with indices
+    """
+    selected = [contours[idx] for idx in indices]
+    if not selected:
+        return np.empty((0, 4), dtype=np.int64)
+
+    lengths = np.fromiter((len(c) for c in selected), dtype=np.int64, count=len(selected))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    points = np.concatenate(selected).reshape(-1, 2).astype(np.int64)
+    mins = np.minimum.reduceat(points, starts)
+    maxs = np.maximum.reduceat(points, starts)
+    return np.concatenate((mins, maxs - mins + 1), axis=1)
+
+
+class ContourFeatures:
+    """
+    Per-contour measurements shared across detection steps
+
+    Hierarchy extraction, shape filtering, confidence scoring and room
+    extraction all look at the same contours. Each measurement is computed
+    the first time it is requested for a contour and read back from the
+    cache afterwards.
+    """
+
+    __slots__ = ('contours', '_areas', '_hull_areas', '_perimeters', '_rects')
+
+    def __init__(self, contours: List):
+        self.contours = contours
+        self._areas = np.full(len(contours), np.nan)
+        self._hull_areas = np.full(len(contours), np.nan)
+        self._perimeters = np.full(len(contours), np.nan)
+        self._rects = np.full((len(contours), 4), -1, dtype=np.int64)
+
+    def areas(self, indices) -> np.ndarray:
+        """Contour areas (cv2.contourArea) for the selected contours"""
+        indices = np.asarray(indices, dtype=np.int64)
+        for idx in indices[np.isnan(self._areas[indices])].tolist():
+            self._areas[idx] = cv2.contourArea(self.contours[idx])
+        return self._areas[indices]
+
+    def hull_areas(self, indices) -> np.ndarray:
+        """Convex hull areas for the selected contours"""
+        indices = np.asarray(indices, dtype=np.int64)
+        for idx in indices[np.isnan(self._hull_areas[indices])].tolist():
+            self._hull_areas[idx] = cv2.contourArea(cv2.convexHull(self.contours[idx]))
+        return self._hull_areas[indices]
+
+    def perimeters(self, indices) -> np.ndarray:
+        """Closed-contour perimeters (cv2.arcLength) for the selected contours"""
+        indices = np.asarray(indices, dtype=np.int64)
+        for idx in indices[np.isnan(self._perimeters[indices])].tolist():
+            self._perimeters[idx] = cv2.arcLength(self.contours[idx], True)
+        return self._perimeters[indices]
+
+    def bounding_rects(self, indices) -> np.ndarray:
+        """(N, 4) [x, y, w, h] bounding rectangles for the selected contours"""
+        indices = np.asarray(indices, dtype=np.int64)
+        missing = indices[self._rects[indices, 2] < 0]
+        if len(missing):
+            self._rects[missing] = contour_bounding_rects(self.contours, missing.tolist())
+        return self._rects[indices]
+
+
 def detect_rooms_improved(preprocessed: dict) -> List[Dict]:
     """
     Improved room detection using hierarchical analysis
@@ -59,11 +179,20 @@ def detect_rooms_improved(preprocessed: dict) -> List[Dict]:
 
     # STEP 1: Find Contours with Hierarchy (3s)
     logger.info("Step 1: Finding contours with hierarchy")
+    contour_scale = DETECTION_CONFIG['contour_scale']
+    contour_input = image
+    if contour_scale != 1.0:
+        contour_input = cv2.resize(image, None, fx=contour_scale, fy=contour_scale,
+                                   interpolation=cv2.INTER_NEAREST)
     contours, hierarchy = cv2.findContours(
-        image,
+        contour_input,
         cv2.RETR_TREE,        # Captures parent-child relationships
         cv2.CHAIN_APPROX_SIMPLE
     )
+    if contour_scale != 1.0:
+        # Back to working-resolution coordinates, so the pixel thresholds
+        # and the output boxes keep their usual meaning
+        contours = tuple((contour / contour_scale).astype(np.int32) for contour in contours)
 
     logger.info(f"Found {len(contours)} total contours")
 
@@ -71,51 +200,65 @@ def detect_rooms_improved(preprocessed: dict) -> List[Dict]:
         logger.warning("No contours found")
         return []
 
+    # Areas, hulls, perimeters and boxes are computed once per contour and
+    # shared by the steps below
+    features = ContourFeatures(contours)
+
     # STEP 2: Extract Candidate Rooms Using Hierarchy (5s)
     logger.info("Step 2: Extracting rooms using hierarchical analysis")
-    candidate_rooms = extract_rooms_from_hierarchy(contours, hierarchy[0])
+    candidate_rooms = extract_rooms_from_hierarchy(
+        contours, hierarchy[0], features.areas(np.arange(len(contours)))
+    )
 
     logger.info(f"Found {len(candidate_rooms)} candidate rooms from hierarchy")
 
     # STEP 3: Filter by Size and Shape (3s)
     logger.info("Step 3: Filtering by size and shape constraints")
-    valid_rooms = filter_by_room_characteristics(candidate_rooms, contours)
+    valid_rooms = filter_by_room_characteristics(candidate_rooms, contours, features)
 
     logger.info(f"After filtering: {len(valid_rooms)} valid rooms")
 
     # STEP 4: Extract Bounding Boxes (2s)
     logger.info("Step 4: Extracting bounding boxes")
-    rooms = []
-    for idx, contour_idx in enumerate(valid_rooms):
-        contour = contours[contour_idx]
-        x, y, w, h = cv2.boundingRect(contour)
-
-        # Calculate quality metrics
-        area = cv2.contourArea(contour)
-        confidence = calculate_room_confidence(contour, (x, y, w, h))
-
-        # Classify type
-        aspect_ratio = max(w, h) / min(w, h) if min(w, h) > 0 else 1
-        type_hint = 'hallway' if aspect_ratio > DETECTION_CONFIG['hallway_aspect_ratio'] else 'room'
-
-        rooms.append({
-            'id': f'room_{idx:03d}',
-            'bounding_box': [x, y, x + w, y + h],
-            'confidence_score': round(confidence, 2),
-            'type_hint': type_hint,
-            'area_pixels': int(area)
-        })
+    # All metrics come from the contour cache, so the rooms are assembled
+    # from whole arrays without any OpenCV calls per room
+    rects = features.bounding_rects(valid_rooms)
+    x, y, w, h = rects.T
+    room_areas = features.areas(valid_rooms)
+    confidences = calculate_room_confidences(
+        room_areas, features.hull_areas(valid_rooms), features.perimeters(valid_rooms), w, h
+    )
+
+    # Classify type
+    short_side = np.minimum(w, h)
+    aspect_ratios = np.divide(
+        np.maximum(w, h), short_side, out=np.ones(len(valid_rooms)), where=short_side > 0
+    )
+    type_hints = np.where(aspect_ratios > DETECTION_CONFIG['hallway_aspect_ratio'], 'hallway', 'room')
+
+    rooms = RoomBatch(
+        np.arange(len(valid_rooms)),
+        np.stack((x, y, x + w, y + h), axis=1),
+        room_areas.astype(np.int64),
+        np.fromiter((round(confidence, 2) for confidence in confidences.tolist()),
+                    dtype=np.float64, count=len(valid_rooms)),
+        np.array(type_hints.tolist(), dtype=object),
+        contour_indices=np.asarray(valid_rooms, dtype=np.int64)
+    )
 
     logger.info(f"Extracted {len(rooms)} room bounding boxes")
 
     # STEP 5: Remove Overlapping Rooms (2s)
     logger.info("Step 5: Removing overlapping duplicates")
-    rooms = remove_duplicates(rooms, iou_threshold=DETECTION_CONFIG['iou_threshold'])
+    if len(rooms) > 1:
+        num_before = len(rooms)
+        rooms = rooms[nms_indices(rooms.bboxes, rooms.confidences, DETECTION_CONFIG['iou_threshold'])]
+        logger.info(f"Removed {num_before - len(rooms)} duplicate rooms")
 
     logger.info(f"After duplicate removal: {len(rooms)} rooms")
 
-    # STEP 6: Sort by area and limit
-    rooms.sort(key=lambda r: r['area_pixels'], reverse=True)
+    # STEP 6: Sort by area and limit, ties keep their order
+    rooms = rooms[np.argsort(-rooms.areas, kind='stable')]
 
     max_rooms = DETECTION_CONFIG['max_rooms']
     if len(rooms) > max_rooms:
@@ -124,10 +267,11 @@ def detect_rooms_improved(preprocessed: dict) -> List[Dict]:
 
     logger.info(f"Detection complete: {len(rooms)} rooms detected")
 
-    return rooms
+    return rooms.to_dicts()
 
 
-def extract_rooms_from_hierarchy(contours: List, hierarchy: np.ndarray) -> List[int]:
+def extract_rooms_from_hierarchy(contours: List, hierarchy: np.ndarray,
+                                 areas: np.ndarray = None) -> List[int]:
     """
     Extract room candidates using contour hierarchy
 
@@ -142,53 +286,48 @@ def extract_rooms_from_hierarchy(contours: List, hierarchy: np.ndarray) -> List[
     Args:
         contours: All detected contours
         hierarchy: Hierarchy array from cv2.findContours
+        areas: Precomputed cv2.contourArea for every contour (computed if omitted)
 
     Returns:
         List of indices for contours that are likely rooms
     """
 
-    room_candidates = []
+    if len(contours) == 0:
+        return []
 
-    for idx in range(len(contours)):
-        # Get hierarchy info: [Next, Previous, First_Child, Parent]
-        next_contour = hierarchy[idx][0]
-        prev_contour = hierarchy[idx][1]
-        first_child = hierarchy[idx][2]
-        parent_idx = hierarchy[idx][3]
+    # Every contour's area is needed either for itself or as a parent, so
+    # compute each one once and apply the filters as array masks
+    if areas is None:
+        areas = np.fromiter((cv2.contourArea(c) for c in contours), dtype=np.float64, count=len(contours))
+    parents = hierarchy[:, 3]
 
-        # FILTER 1: Must have a parent (enclosed by something)
-        if parent_idx == -1:
-            continue  # Top-level contour, probably the image border or outer wall
+    # FILTER 1: Must have a parent (enclosed by something)
+    # Top-level contours are probably the image border or outer wall
+    has_parent = parents != -1
 
-        # Get contour area
-        area = cv2.contourArea(contours[idx])
+    # FILTER 2 + 3: Must have minimum size, must not be too large
+    size_ok = (areas >= DETECTION_CONFIG['min_room_area_pixels']) & \
+              (areas <= DETECTION_CONFIG['max_room_area_pixels'])
 
-        # FILTER 2: Must have minimum size
-        if area < DETECTION_CONFIG['min_room_area_pixels']:
-            continue
-
-        # FILTER 3: Must not be too large
-        if area > DETECTION_CONFIG['max_room_area_pixels']:
-            continue
+    # FILTER 4: Check relationship with parent
+    # Room should be significantly smaller than its enclosing contour
+    parent_areas = areas[np.where(has_parent, parents, 0)]
+    area_ratios = np.divide(areas, parent_areas, out=np.zeros_like(areas), where=parent_areas > 0)
+    ratio_ok = (parent_areas > 0) & \
+               (area_ratios > DETECTION_CONFIG['min_area_ratio_to_parent']) & \
+               (area_ratios < DETECTION_CONFIG['max_area_ratio_to_parent'])
 
-        # FILTER 4: Check relationship with parent
-        parent_area = cv2.contourArea(contours[parent_idx])
+    room_candidates = np.flatnonzero(has_parent & size_ok & ratio_ok).tolist()
 
-        if parent_area > 0:
-            area_ratio = area / parent_area
-
-            # Room should be significantly smaller than its enclosing contour
-            min_ratio = DETECTION_CONFIG['min_area_ratio_to_parent']
-            max_ratio = DETECTION_CONFIG['max_area_ratio_to_parent']
-
-            if min_ratio < area_ratio < max_ratio:
-                room_candidates.append(idx)
-                logger.debug(f"Room candidate {idx}: area={area}, parent_ratio={area_ratio:.2f}")
+    if logger.isEnabledFor(logging.DEBUG):
+        for idx in room_candidates:
+            logger.debug(f"Room candidate {idx}: area={areas[idx]}, parent_ratio={area_ratios[idx]:.2f}")
 
     return room_candidates
 
 
-def filter_by_room_characteristics(candidate_indices: List[int], contours: List) -> List[int]:
+def filter_by_room_characteristics(candidate_indices: List[int], contours: List,
+                                   features: ContourFeatures = None) -> List[int]:
     """
     Apply shape and quality filters to eliminate false positives
 
@@ -200,19 +339,18 @@ def filter_by_room_characteristics(candidate_indices: List[int], contours: List)
     Args:
         candidate_indices: Indices of candidate rooms
         contours: All contours
+        features: Shared measurement cache for contours (created if omitted)
 
     Returns:
         Filtered list of room indices
     """
 
-    valid_rooms = []
-
-    for idx in candidate_indices:
-        contour = contours[idx]
-
-        # Get bounding rectangle
-        x, y, w, h = cv2.boundingRect(contour)
+    if features is None:
+        features = ContourFeatures(contours)
 
+    # Cheapest filters first, so hulls are only built for contours that pass them
+    shaped = []
+    for idx, (x, y, w, h) in zip(candidate_indices, features.bounding_rects(candidate_indices).tolist()):
         # FILTER 1: Minimum dimensions
         if w < DETECTION_CONFIG['min_room_dimension'] or h < DETECTION_CONFIG['min_room_dimension']:
             logger.debug(f"Rejected {idx}: too small ({w}x{h})")
@@ -229,40 +367,52 @@ def filter_by_room_characteristics(candidate_indices: List[int], contours: List)
             logger.debug(f"Rejected {idx}: aspect ratio too large ({aspect_ratio:.2f})")
             continue
 
-        # FILTER 3: Solidity (contour area / convex hull area)
-        # Rooms should be fairly solid shapes, not irregular
-        hull = cv2.convexHull(contour)
-        hull_area = cv2.contourArea(hull)
-        contour_area = cv2.contourArea(contour)
-
-        solidity = contour_area / hull_area if hull_area > 0 else 0
-
-        if solidity < DETECTION_CONFIG['min_solidity']:
-            logger.debug(f"Rejected {idx}: low solidity ({solidity:.2f})")
-            continue
+        shaped.append((idx, w * h, aspect_ratio))
 
-        # FILTER 4: Extent (contour area / bounding box area)
-        # Rooms should fill most of their bounding box
-        bbox_area = w * h
+    # FILTER 3: Extent (contour area / bounding box area)
+    # Rooms should fill most of their bounding box. Areas are cheap, so this
+    # runs before the convex hulls too.
+    filled = []
+    shaped_indices = [idx for idx, _, _ in shaped]
+    for (idx, bbox_area, aspect_ratio), contour_area in zip(shaped, features.areas(shaped_indices).tolist()):
         extent = contour_area / bbox_area if bbox_area > 0 else 0
 
         if extent < DETECTION_CONFIG['min_extent']:
             logger.debug(f"Rejected {idx}: low extent ({extent:.2f})")
             continue
 
+        filled.append((idx, contour_area, aspect_ratio))
+
+    valid_rooms = []
+    hull_areas = features.hull_areas([idx for idx, _, _ in filled]).tolist()
+
+    for (idx, contour_area, aspect_ratio), hull_area in zip(filled, hull_areas):
+        # FILTER 4: Solidity (contour area / convex hull area)
+        # Rooms should be fairly solid shapes, not irregular
+        solidity = contour_area / hull_area if hull_area > 0 else 0
+
+        if solidity < DETECTION_CONFIG['min_solidity']:
+            logger.debug(f"Rejected {idx}: low solidity ({solidity:.2f})")
+            continue
+
         valid_rooms.append(idx)
         logger.debug(f"Accepted {idx}: area={contour_area:.0f}, aspect={aspect_ratio:.2f}, solidity={solidity:.2f}")
 
     return valid_rooms
 
 
-def calculate_room_confidence(contour, bbox: Tuple[int, int, int, int]) -> float:
+def calculate_room_confidence(contour, bbox: Tuple[int, int, int, int],
+                              contour_area: float = None, hull_area: float = None,
+                              perimeter: float = None) -> float:
     """
     Calculate confidence score based on multiple quality metrics
 
     Args:
         contour: OpenCV contour
         bbox: Bounding box (x, y, w, h)
+        contour_area: Precomputed contour area (computed if omitted)
+        hull_area: Precomputed convex hull area (computed if omitted)
+        perimeter: Precomputed closed-contour perimeter (computed if omitted)
 
     Returns:
         Confidence score (0.0 to 1.0)
@@ -270,25 +420,57 @@ def calculate_room_confidence(contour, bbox: Tuple[int, int, int, int]) -> float
 
     x, y, w, h = bbox
 
+    if contour_area is None:
+        contour_area = cv2.contourArea(contour)
+    if hull_area is None:
+        hull_area = cv2.contourArea(cv2.convexHull(contour))
+    if perimeter is None:
+        perimeter = cv2.arcLength(contour, True)
+
+    confidences = calculate_room_confidences(
+        np.array([contour_area]), np.array([hull_area]), np.array([perimeter]),
+        np.array([w]), np.array([h])
+    )
+    return float(confidences[0])
+
+
+def calculate_room_confidences(areas: np.ndarray, hull_areas: np.ndarray,
+                               perimeters: np.ndarray, widths: np.ndarray,
+                               heights: np.ndarray) -> np.ndarray:
+    """
+    Vectorized calculate_room_confidence over a batch of contours
+
+    Args:
+        areas: Contour areas
+        hull_areas: Convex hull areas
+        perimeters: Closed-contour perimeters
+        widths: Bounding box widths
+        heights: Bounding box heights
+
+    Returns:
+        Confidence scores (0.0 to 1.0), one per contour
+    """
+
+    areas = np.asarray(areas, dtype=np.float64)
+    hull_areas = np.asarray(hull_areas, dtype=np.float64)
+    perimeters = np.asarray(perimeters, dtype=np.float64)
+    zeros = np.zeros_like(areas)
+
     # Metric 1: Rectangularity (how well does it fit the bounding box)
-    contour_area = cv2.contourArea(contour)
-    bbox_area = w * h
-    rectangularity = contour_area / bbox_area if bbox_area > 0 else 0
+    bbox_areas = np.asarray(widths, dtype=np.float64) * np.asarray(heights, dtype=np.float64)
+    rectangularity = np.divide(areas, bbox_areas, out=zeros.copy(), where=bbox_areas > 0)
 
     # Metric 2: Solidity (how convex is the shape)
-    hull = cv2.convexHull(contour)
-    hull_area = cv2.contourArea(hull)
-    solidity = contour_area / hull_area if hull_area > 0 else 0
+    solidity = np.divide(areas, hull_areas, out=zeros.copy(), where=hull_areas > 0)
 
     # Metric 3: Size appropriateness
     # Assume typical room is around 10,000 pixels at 2000px image width
     typical_room_area = 10000
-    size_score = min(contour_area / typical_room_area, 1.0)
+    size_score = np.minimum(areas / typical_room_area, 1.0)
 
     # Metric 4: Shape regularity (perimeter vs area)
-    perimeter = cv2.arcLength(contour, True)
     # Compactness: 4π * area / perimeter^2 (circle = 1.0, square ≈ 0.785)
-    compactness = 4 * np.pi * contour_area / (perimeter ** 2) if perimeter > 0 else 0
+    compactness = np.divide(4 * np.pi * areas, perimeters ** 2, out=zeros.copy(), where=perimeters > 0)
 
     # Weighted combination
     confidence = (
@@ -298,7 +480,7 @@ def calculate_room_confidence(contour, bbox: Tuple[int, int, int, int]) -> float
         0.20 * compactness        # Less important: some rooms are irregular
     )
 
-    return min(confidence, 1.0)
+    return np.minimum(confidence, 1.0)
 
 
 def remove_duplicates(rooms: List[Dict], iou_threshold: float = 0.5) -> List[Dict]:
@@ -316,32 +498,45 @@ def remove_duplicates(rooms: List[Dict], iou_threshold: float = 0.5) -> List[Dic
     if len(rooms) <= 1:
         return rooms
 
-    # Sort by confidence score (keep higher confidence rooms)
-    rooms_sorted = sorted(rooms, key=lambda r: r['confidence_score'], reverse=True)
+    keep_indices = nms_indices(
+        [r['bounding_box'] for r in rooms],
+        [r['confidence_score'] for r in rooms],
+        iou_threshold
+    )
+    keep = [rooms[i] for i in keep_indices]
 
-    keep = []
-    skip_indices = set()
+    logger.info(f"Removed {len(rooms) - len(keep)} duplicate rooms")
+    return keep
 
-    for i, room1 in enumerate(rooms_sorted):
-        if i in skip_indices:
-            continue
 
-        keep.append(room1)
+def nms_indices(boxes, scores, iou_threshold: float) -> np.ndarray:
+    """
+    Non-maximum suppression over bounding boxes using OpenCV
 
-        # Check against remaining rooms
-        for j in range(i + 1, len(rooms_sorted)):
-            if j in skip_indices:
-                continue
+    Visits boxes by descending score (ties keep their input order) and drops
+    every box whose IoU with an already kept box exceeds the threshold
 
-            room2 = rooms_sorted[j]
-            iou = calculate_iou(room1['bounding_box'], room2['bounding_box'])
+    Args:
+        boxes: (N, 4) array-like of [x_min, y_min, x_max, y_max]
+        scores: (N,) array-like of confidence scores
+        iou_threshold: IoU threshold above which boxes are considered duplicates
 
-            if iou > iou_threshold:
-                skip_indices.add(j)
-                logger.debug(f"Removing duplicate: IoU={iou:.2f} between {room1['id']} and {room2['id']}")
+    Returns:
+        Indices of kept boxes, highest score first
+    """
 
-    logger.info(f"Removed {len(rooms) - len(keep)} duplicate rooms")
-    return keep
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    boxes_xywh = np.hstack([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]])
+
+    # NMSBoxes discards scores <= score_threshold (which must be >= 0),
+    # so shift scores up by 1 to keep rooms with 0.0 confidence
+    shifted_scores = np.asarray(scores, dtype=np.float64) + 1.0
+
+    keep_indices = cv2.dnn.NMSBoxes(
+        boxes_xywh.tolist(), shifted_scores.tolist(),
+        score_threshold=0.0, nms_threshold=iou_threshold
+    )
+    return np.asarray(keep_indices, dtype=np.int64).reshape(-1)
 
 
 def calculate_iou(box1: List[int], box2: List[int]) -> float:
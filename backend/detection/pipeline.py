@@ -0,0 +1,39 @@
+"""
+Detection Pipeline Selection
+Maps a detection mode to its preprocessing and room detection functions
+"""
+
+from functools import lru_cache
+from typing import Callable, Tuple
+
+DETECTION_MODES = ('adaptive', 'improved')
+
+
+@lru_cache(maxsize=None)
+def get_pipeline(mode: str = 'adaptive') -> Tuple[Callable, Callable]:
+    """
+    Get the preprocessing and detection functions for a detection mode
+
+    Only the modules for the requested mode are imported.
+
+    Args:
+        mode: 'adaptive' (auto-adjusts to blueprint style) or
+              'improved' (fixed parameters, hierarchical analysis)
+
+    Returns:
+        Tuple of (preprocess_pipeline, detect_rooms) functions
+
+    Raises:
+        ValueError: If mode is not a known detection mode
+    """
+    if mode == 'adaptive':
+        from detection.preprocessing_adaptive import preprocess_pipeline_adaptive
+        from detection.opencv_detector_adaptive import detect_rooms_adaptive
+        return preprocess_pipeline_adaptive, detect_rooms_adaptive
+
+    if mode == 'improved':
+        from detection.preprocessing_improved import preprocess_pipeline_improved
+        from detection.opencv_detector_improved import detect_rooms_improved
+        return preprocess_pipeline_improved, detect_rooms_improved
+
+    raise ValueError(f"Unknown detection mode: {mode}. Expected one of {DETECTION_MODES}")
@@ -17,6 +17,8 @@ PREPROCESSING_CONFIG = {
     'denoise_strength': 10,
     'contrast_clip_limit': 2.0,
     'morph_iterations': 2,
+    'denoise_scale': 1.0,  # Denoise at this fraction of full size, then upsample (0.5 ~4x faster)
+    'use_opencl': False,   # Run stages 4-7 via OpenCL (T-API) when a device is available
     'min_file_size': 10_000,
     'max_file_size': 10_485_760
 }
@@ -47,28 +49,88 @@ def preprocess_pipeline(image_data: bytes) -> dict:
     if raw_image is None:
         raise ValueError("Invalid image data - unable to decode")
 
+    return preprocess_pipeline_from_array(raw_image)
+
+
+def preprocess_pipeline_from_array(raw_image: np.ndarray) -> dict:
+    """
+    Preprocessing pipeline for an image that is already decoded
+
+    Runs every stage of preprocess_pipeline after decoding, so callers
+    holding an array (e.g. from cv2.imread) don't have to encode it first.
+
+    Args:
+        raw_image: Image as numpy array (BGR format)
+
+    Returns:
+        Same dictionary as preprocess_pipeline
+    """
+
     original_shape = raw_image.shape
     logger.info(f"Original image shape: {original_shape}")
 
-    # STAGE 2: Resize (0.5s)
-    logger.info("Stage 2: Resizing image")
-    resized = resize_maintain_aspect_ratio(
-        raw_image,
+    # STAGE 2: Convert to Grayscale (0.2s)
+    # Done before resizing so the resize only has to touch one channel
+    logger.info("Stage 2: Converting to grayscale")
+    gray = cv2.cvtColor(raw_image, cv2.COLOR_BGR2GRAY)
+
+    # STAGE 3: Resize (0.5s)
+    logger.info("Stage 3: Resizing image")
+    gray = resize_maintain_aspect_ratio(
+        gray,
         max_dimension=PREPROCESSING_CONFIG['max_dimension']
     )
 
-    # STAGE 3: Convert to Grayscale (0.2s)
-    logger.info("Stage 3: Converting to grayscale")
-    gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+    # STAGES 4-7 stay on the OpenCL device when enabled; if the device path
+    # fails, the CPU path is used instead
+    use_opencl = PREPROCESSING_CONFIG['use_opencl'] and cv2.ocl.haveOpenCL()
+    try:
+        closed = enhance_and_binarize(gray, use_opencl)
+    except cv2.error as e:
+        if not use_opencl:
+            raise
+        logger.warning(f"OpenCL preprocessing failed, falling back to CPU: {e}")
+        closed = enhance_and_binarize(gray, use_opencl=False)
+
+    scale_factor = original_shape[0] / closed.shape[0]
+
+    logger.info(f"Preprocessing complete. Output shape: {closed.shape}, Scale factor: {scale_factor:.2f}")
+
+    return {
+        'processed': closed,
+        'original_shape': original_shape,
+        'scale_factor': scale_factor
+    }
+
+
+def enhance_and_binarize(gray: np.ndarray, use_opencl: bool = False) -> np.ndarray:
+    """
+    Denoise, enhance contrast, threshold and close gaps (stages 4-7)
+
+    Args:
+        gray: Grayscale image
+        use_opencl: Keep intermediate images on the OpenCL device (UMat)
+
+    Returns:
+        Binary image ready for detection
+    """
 
     # STAGE 4: Noise Reduction (0.5s)
     logger.info("Stage 4: Reducing noise")
+    denoise_scale = PREPROCESSING_CONFIG['denoise_scale']
+    denoise_input = gray
+    if denoise_scale != 1.0:
+        denoise_input = cv2.resize(gray, None, fx=denoise_scale, fy=denoise_scale,
+                                   interpolation=cv2.INTER_AREA)
     denoised = cv2.fastNlMeansDenoising(
-        gray,
+        cv2.UMat(denoise_input) if use_opencl else denoise_input,
         h=PREPROCESSING_CONFIG['denoise_strength'],
         templateWindowSize=7,
         searchWindowSize=21
     )
+    if denoise_scale != 1.0:
+        denoised = cv2.resize(denoised, (gray.shape[1], gray.shape[0]),
+                              interpolation=cv2.INTER_LINEAR)
 
     # STAGE 5: Contrast Enhancement (0.3s)
     logger.info("Stage 5: Enhancing contrast")
@@ -96,15 +158,7 @@ def preprocess_pipeline(image_data: bytes) -> dict:
         iterations=PREPROCESSING_CONFIG['morph_iterations']
     )
 
-    scale_factor = original_shape[0] / closed.shape[0]
-
-    logger.info(f"Preprocessing complete. Output shape: {closed.shape}, Scale factor: {scale_factor:.2f}")
-
-    return {
-        'processed': closed,
-        'original_shape': original_shape,
-        'scale_factor': scale_factor
-    }
+    return closed.get() if use_opencl else closed
 
 
 def decode_image(image_data: bytes) -> np.ndarray:
@@ -120,8 +174,19 @@ def decode_image(image_data: bytes) -> np.ndarray:
     Raises:
         ValueError: If image cannot be decoded
     """
+    # OpenCV decodes the common formats (PNG, JPEG, WebP, TIFF, BMP) straight
+    # to BGR in C, skipping PIL's RGB array and the channel swap. EXIF
+    # orientation is ignored to match the PIL path.
+    if image_data:
+        bgr_image = cv2.imdecode(
+            np.frombuffer(image_data, dtype=np.uint8),
+            cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+        )
+        if bgr_image is not None:
+            return bgr_image
+
     try:
-        # Try using PIL first (handles more formats)
+        # Fall back to PIL for formats OpenCV can't read (GIF, ...)
         pil_image = Image.open(BytesIO(image_data))
 
         # Convert to RGB if needed
@@ -160,10 +225,18 @@ def resize_maintain_aspect_ratio(image: np.ndarray, max_dimension: int = 2000) -
         new_width = int(width * scale)
         new_height = int(height * scale)
 
+        # Large downscales: halve with pyrDown (Gaussian, SIMD) until within
+        # 2x of the target, then finish with a cheap linear resize. INTER_AREA
+        # averages every input pixel and is 2-5x slower on 4k+ scans
+        interpolation = cv2.INTER_AREA
+        while max(image.shape[:2]) * 0.5 > max_dimension:
+            image = cv2.pyrDown(image)
+            interpolation = cv2.INTER_LINEAR
+
         resized = cv2.resize(
             image,
             (new_width, new_height),
-            interpolation=cv2.INTER_AREA
+            interpolation=interpolation
         )
 
         logger.info(f"Resized from {width}x{height} to {new_width}x{new_height}")
@@ -5,12 +5,16 @@ Adjusts preprocessing parameters based on blueprint characteristics
 
 import cv2
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from io import BytesIO
+from typing import List
 from PIL import Image
 import logging
 
 from detection.blueprint_analyzer import analyze_blueprint_characteristics
 from detection.debug_visualizer import debug_viz
+from detection.preprocessing_improved import otsu_separability
 from detection.text_filter import filter_text_regions
 
 logger = logging.getLogger(__name__)
@@ -27,7 +31,19 @@ BASE_CONFIG = {
     'morph_dilate_size': 2,
     'morph_dilate_iterations': 1,
     'min_file_size': 10_000,
-    'max_file_size': 10_485_760
+    'max_file_size': 10_485_760,
+
+    # Skip non-local means when Otsu already splits the grayscale image
+    # cleanly (between-class / total variance ratio, at or above this).
+    # Clean digital exports score ~1.0, scanned samples ~0.80-0.87
+    'skip_denoise_min_separability': 0.95,
+
+    # Denoise at this fraction of the working resolution, then upsample.
+    # 0.5 cuts non-local means time ~4x but shifts thresholds slightly
+    'denoise_scale': 1.0,
+
+    # Run denoise + CLAHE through OpenCL (T-API) when a device is available
+    'use_opencl': False
 }
 
 
@@ -58,16 +74,17 @@ def preprocess_pipeline_adaptive(image_data: bytes) -> dict:
     original_shape = raw_image.shape
     logger.info(f"Original image shape: {original_shape}")
 
-    # STAGE 2: Resize
-    logger.info("Stage 2: Resizing image")
-    resized = resize_maintain_aspect_ratio(
-        raw_image,
+    # STAGE 2: Convert to Grayscale
+    # Done before resizing so the resize only has to touch one channel
+    logger.info("Stage 2: Converting to grayscale")
+    gray = cv2.cvtColor(raw_image, cv2.COLOR_BGR2GRAY)
+
+    # STAGE 3: Resize
+    logger.info("Stage 3: Resizing image")
+    gray = resize_maintain_aspect_ratio(
+        gray,
         max_dimension=BASE_CONFIG['max_dimension']
     )
-
-    # STAGE 3: Convert to Grayscale
-    logger.info("Stage 3: Converting to grayscale")
-    gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
     debug_viz.save('1_grayscale', gray, "Converted to grayscale")
 
     # STAGE 3.5: ANALYZE BLUEPRINT (NEW!)
@@ -81,12 +98,30 @@ def preprocess_pipeline_adaptive(image_data: bytes) -> dict:
 
     # STAGE 4: Noise Reduction (ADAPTIVE)
     logger.info("Stage 4: Reducing noise (adaptive strength)")
-    denoised = cv2.fastNlMeansDenoising(
-        gray,
-        h=adaptive_params['denoise_strength'],
-        templateWindowSize=7,
-        searchWindowSize=21
-    )
+    # With OpenCL enabled, UMat inputs dispatch these filters to the device
+    use_opencl = BASE_CONFIG['use_opencl'] and cv2.ocl.haveOpenCL()
+    if use_opencl:
+        logger.info("Using OpenCL for denoising and contrast enhancement")
+    separability = otsu_separability(gray)
+    if separability >= BASE_CONFIG['skip_denoise_min_separability']:
+        # Clean two-tone drawing - nothing for NLM to remove
+        logger.info(f"Skipping denoise (separability {separability:.3f})")
+        denoised = cv2.UMat(gray) if use_opencl else gray
+    else:
+        denoise_scale = BASE_CONFIG['denoise_scale']
+        denoise_input = gray
+        if denoise_scale != 1.0:
+            denoise_input = cv2.resize(gray, None, fx=denoise_scale, fy=denoise_scale,
+                                       interpolation=cv2.INTER_AREA)
+        denoised = cv2.fastNlMeansDenoising(
+            cv2.UMat(denoise_input) if use_opencl else denoise_input,
+            h=adaptive_params['denoise_strength'],
+            templateWindowSize=7,
+            searchWindowSize=21
+        )
+        if denoise_scale != 1.0:
+            denoised = cv2.resize(denoised, (gray.shape[1], gray.shape[0]),
+                                  interpolation=cv2.INTER_LINEAR)
 
     # STAGE 5: Contrast Enhancement
     logger.info("Stage 5: Enhancing contrast")
@@ -95,6 +130,8 @@ def preprocess_pipeline_adaptive(image_data: bytes) -> dict:
         tileGridSize=(8, 8)
     )
     enhanced = clahe.apply(denoised)
+    if use_opencl:
+        enhanced = enhanced.get()
 
     # STAGE 6: Thresholding
     logger.info("Stage 6: Applying threshold")
@@ -127,6 +164,48 @@ def preprocess_pipeline_adaptive(image_data: bytes) -> dict:
     }
 
 
+@lru_cache(maxsize=None)
+def _structuring_element(shape: int, size: int) -> np.ndarray:
+    """Square structuring element, built once per (shape, size) and reused"""
+    return cv2.getStructuringElement(shape, (size, size))
+
+
+def _init_batch_worker():
+    """Keep each worker's OpenCV single-threaded so processes don't oversubscribe cores"""
+    cv2.setNumThreads(1)
+
+
+def _preprocess_and_flush(image_data: bytes) -> dict:
+    """Worker entry point: pool workers exit without running atexit, so flush debug writes here"""
+    try:
+        return preprocess_pipeline_adaptive(image_data)
+    finally:
+        debug_viz.flush()
+
+
+def preprocess_batch(images: List[bytes], max_workers: int = None) -> List[dict]:
+    """
+    Run adaptive preprocessing on several uploads in parallel
+
+    Each image is independent, so denoising and morphology for different
+    uploads run in separate worker processes. Debug images are still written
+    (each worker gets its own writer thread), but share the same names.
+
+    Args:
+        images: Raw image bytes, one entry per upload
+        max_workers: Worker process count (defaults to the CPU count)
+
+    Returns:
+        preprocess_pipeline_adaptive results, in the same order as the inputs
+    """
+    if len(images) <= 1 or max_workers == 1:
+        return [preprocess_pipeline_adaptive(image_data) for image_data in images]
+
+    logger.info(f"Running batch preprocessing on {len(images)} images")
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_batch_worker) as executor:
+        return list(executor.map(_preprocess_and_flush, images))
+
+
 def apply_adaptive_morphology(binary_image: np.ndarray, adaptive_params: dict) -> np.ndarray:
     """
     Apply morphological operations using adaptive parameters
@@ -140,7 +219,7 @@ def apply_adaptive_morphology(binary_image: np.ndarray, adaptive_params: dict) -
 
     # OPERATION 1: Close gaps in walls (adaptive)
     close_size = adaptive_params.get('morph_close_size', 3)
-    kernel_close = cv2.getStructuringElement(cv2.MORPH_RECT, (close_size, close_size))
+    kernel_close = _structuring_element(cv2.MORPH_RECT, close_size)
     closed = cv2.morphologyEx(
         binary_image,
         cv2.MORPH_CLOSE,
@@ -151,7 +230,7 @@ def apply_adaptive_morphology(binary_image: np.ndarray, adaptive_params: dict) -
 
     # OPERATION 2: Remove details (ADAPTIVE - key parameter!)
     open_size = adaptive_params['morph_open_size']
-    kernel_open = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (open_size, open_size))
+    kernel_open = _structuring_element(cv2.MORPH_ELLIPSE, open_size)
     opened = cv2.morphologyEx(
         closed,
         cv2.MORPH_OPEN,
@@ -167,7 +246,7 @@ def apply_adaptive_morphology(binary_image: np.ndarray, adaptive_params: dict) -
 
     # OPERATION 3: Dilate to strengthen walls (adaptive)
     dilate_size = adaptive_params.get('morph_dilate_size', 2)
-    kernel_dilate = cv2.getStructuringElement(cv2.MORPH_RECT, (dilate_size, dilate_size))
+    kernel_dilate = _structuring_element(cv2.MORPH_RECT, dilate_size)
     enhanced = cv2.dilate(
         opened,
         kernel_dilate,
@@ -180,39 +259,43 @@ def apply_adaptive_morphology(binary_image: np.ndarray, adaptive_params: dict) -
 
 def fill_hollow_rooms(binary_image: np.ndarray) -> np.ndarray:
     """
-    Fill hollow room regions using morphological closing with large kernel
+    Fill hollow room regions using morphological opening with large kernel
 
     This fixes the issue where thick-walled CAD blueprints create hollow room outlines
     instead of solid filled regions.
 
-    Strategy:
-    1. Invert image (rooms become white, walls become black)
-    2. Fill holes using morphological closing with large kernel
-    3. Invert back
+    Closing the inverted image (rooms white) and inverting back is the same
+    as opening the image directly, so this is done in one morphology call
+    without the two full-image inversions.
     """
 
-    # Invert so rooms are white
-    inverted = cv2.bitwise_not(binary_image)
-
-    # Fill small holes within rooms using morphological closing
+    # Fill small holes within rooms (= remove thin wall-colored details)
     # Large kernel to fill room interiors without filling gaps between walls
-    fill_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
-    filled = cv2.morphologyEx(
-        inverted,
-        cv2.MORPH_CLOSE,
+    fill_kernel = _structuring_element(cv2.MORPH_RECT, 15)
+    result = cv2.morphologyEx(
+        binary_image,
+        cv2.MORPH_OPEN,
         fill_kernel,
         iterations=2
     )
 
-    # Invert back
-    result = cv2.bitwise_not(filled)
-
-    logger.debug("Filled hollow rooms using large kernel closing")
+    logger.debug("Filled hollow rooms using large kernel opening")
     return result
 
 
 def decode_image(image_data: bytes) -> np.ndarray:
     """Decode image from bytes to numpy array"""
+    # OpenCV decodes the common formats (PNG, JPEG, WebP, TIFF, BMP) straight
+    # to BGR in C, skipping PIL's RGB array and the channel swap. EXIF
+    # orientation is ignored to match the PIL path.
+    if image_data:
+        bgr_image = cv2.imdecode(
+            np.frombuffer(image_data, dtype=np.uint8),
+            cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+        )
+        if bgr_image is not None:
+            return bgr_image
+
     try:
         pil_image = Image.open(BytesIO(image_data))
 
@@ -238,10 +321,18 @@ def resize_maintain_aspect_ratio(image: np.ndarray, max_dimension: int = 2000) -
         new_width = int(width * scale)
         new_height = int(height * scale)
 
+        # Large downscales: halve with pyrDown (Gaussian, SIMD) until within
+        # 2x of the target, then finish with a cheap linear resize. INTER_AREA
+        # averages every input pixel and is 2-5x slower on 4k+ scans
+        interpolation = cv2.INTER_AREA
+        while max(image.shape[:2]) * 0.5 > max_dimension:
+            image = cv2.pyrDown(image)
+            interpolation = cv2.INTER_LINEAR
+
         resized = cv2.resize(
             image,
             (new_width, new_height),
-            interpolation=cv2.INTER_AREA
+            interpolation=interpolation
         )
 
         logger.info(f"Resized from {width}x{height} to {new_width}x{new_height}")
@@ -9,8 +9,11 @@ Metrics:
 - F1 Score: harmonic mean of precision and recall
 """
 
+import argparse
+import hashlib
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import cv2
 import numpy as np
@@ -18,6 +21,11 @@ from detection.preprocessing_adaptive import preprocess_pipeline_adaptive
 from detection.opencv_detector_adaptive import detect_rooms_adaptive
 from detection.normalizer import normalize_coordinates
 
+# Detection results are cached here, keyed by image content and a hash of
+# the detection code, so rerunning with new matching settings skips the
+# CV pipeline. Editing anything under detection/ invalidates the cache.
+CACHE_DIR = Path(__file__).parent / 'eval_cache'
+
 def calculate_iou(box1, box2):
     """
     Calculate Intersection over Union (IoU) for two bounding boxes.
@@ -52,10 +60,49 @@ def calculate_iou(box1, box2):
     return inter_area / union_area if union_area > 0 else 0.0
 
 
-def match_rooms(ground_truth_rooms, detected_rooms, iou_threshold=0.5):
+def calculate_iou_matrix(boxes1, boxes2):
+    """
+    Calculate IoU for every pair of boxes in two lists at once.
+
+    Uses the same arithmetic as calculate_iou, broadcast over all pairs.
+
+    Args:
+        boxes1: N boxes [xmin, ymin, xmax, ymax] in normalized coordinates
+        boxes2: M boxes in the same format
+
+    Returns:
+        (N, M) array of IoU scores (0.0-1.0)
+    """
+    boxes1 = np.asarray(boxes1, dtype=np.float64).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float64).reshape(-1, 4)
+
+    # Calculate intersection (zero width/height when boxes don't overlap)
+    inter_w = np.maximum(
+        np.minimum(boxes1[:, None, 2], boxes2[None, :, 2]) - np.maximum(boxes1[:, None, 0], boxes2[None, :, 0]), 0
+    )
+    inter_h = np.maximum(
+        np.minimum(boxes1[:, None, 3], boxes2[None, :, 3]) - np.maximum(boxes1[:, None, 1], boxes2[None, :, 1]), 0
+    )
+    inter_area = inter_w * inter_h
+
+    # Calculate union
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    union_area = area1[:, None] + area2[None, :] - inter_area
+
+    return np.divide(inter_area, union_area, out=np.zeros_like(inter_area),
+                     where=(inter_area > 0) & (union_area > 0))
+
+
+def match_rooms(ground_truth_rooms, detected_rooms, iou_threshold=0.5, optimal=False):
     """
     Match detected rooms to ground truth rooms using IoU threshold.
 
+    By default pairs are matched greedily, highest IoU first. With
+    optimal=True the matching maximizes total IoU over all pairs above the
+    threshold (Hungarian algorithm, requires scipy), which can recover
+    matches that greedy matching gives away.
+
     Returns:
         matches: list of (gt_idx, det_idx, iou) tuples
         unmatched_gt: list of ground truth room indices not matched
@@ -66,38 +113,43 @@ def match_rooms(ground_truth_rooms, detected_rooms, iou_threshold=0.5):
     matched_det = set()
 
     # Calculate IoU matrix
-    iou_matrix = []
-    for gt_room in ground_truth_rooms:
-        gt_box = gt_room['bounding_box_normalized']
-        row = []
-        for det_room in detected_rooms:
-            det_box = det_room['bounding_box_normalized']
-            iou = calculate_iou(gt_box, det_box)
-            row.append(iou)
-        iou_matrix.append(row)
-
-    # Greedy matching: match highest IoU pairs first
-    while True:
-        max_iou = 0.0
-        max_pos = None
-
-        for i, row in enumerate(iou_matrix):
-            if i in matched_gt:
-                continue
-            for j, iou in enumerate(row):
-                if j in matched_det:
-                    continue
-                if iou >= iou_threshold and iou > max_iou:
-                    max_iou = iou
-                    max_pos = (i, j)
-
-        if max_pos is None:
-            break
-
-        gt_idx, det_idx = max_pos
-        matches.append((gt_idx, det_idx, max_iou))
-        matched_gt.add(gt_idx)
-        matched_det.add(det_idx)
+    iou_matrix = calculate_iou_matrix(
+        [room['bounding_box_normalized'] for room in ground_truth_rooms],
+        [room['bounding_box_normalized'] for room in detected_rooms]
+    )
+
+    # Pairs below the threshold can never match
+    candidates = np.where(iou_matrix >= iou_threshold, iou_matrix, 0.0)
+
+    if optimal:
+        from scipy.optimize import linear_sum_assignment
+
+        gt_indices, det_indices = linear_sum_assignment(candidates, maximize=True)
+        for gt_idx, det_idx, iou in zip(gt_indices.tolist(), det_indices.tolist(),
+                                        candidates[gt_indices, det_indices].tolist()):
+            if iou > 0:
+                matches.append((gt_idx, det_idx, iou))
+                matched_gt.add(gt_idx)
+                matched_det.add(det_idx)
+
+        # Same order as greedy output: highest IoU first
+        matches.sort(key=lambda match: match[2], reverse=True)
+
+    else:
+        # Greedy matching: match highest IoU pairs first, clearing a matched
+        # room's row/column
+        while candidates.size:
+            gt_idx, det_idx = np.unravel_index(np.argmax(candidates), candidates.shape)
+            max_iou = candidates[gt_idx, det_idx]
+
+            if max_iou <= 0:
+                break
+
+            matches.append((int(gt_idx), int(det_idx), float(max_iou)))
+            matched_gt.add(int(gt_idx))
+            matched_det.add(int(det_idx))
+            candidates[gt_idx, :] = 0
+            candidates[:, det_idx] = 0
 
     # Find unmatched
     unmatched_gt = [i for i in range(len(ground_truth_rooms)) if i not in matched_gt]
@@ -106,10 +158,20 @@ def match_rooms(ground_truth_rooms, detected_rooms, iou_threshold=0.5):
     return matches, unmatched_gt, unmatched_det
 
 
-def evaluate_sample(ground_truth_path, image_path):
+def _pipeline_fingerprint():
+    """Short hash of the detection package sources"""
+    digest = hashlib.sha1()
+    for path in sorted((Path(__file__).parent / 'detection').glob('*.py')):
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def evaluate_sample(ground_truth_path, image_path, use_cache=True):
     """
     Evaluate AI detection for a single sample.
 
+    Detected rooms are read from / written to CACHE_DIR unless use_cache is False.
+
     Returns:
         metrics dict with precision, recall, f1, etc.
     """
@@ -124,18 +186,29 @@ def evaluate_sample(ground_truth_path, image_path):
     with open(image_path, 'rb') as f:
         image_data = f.read()
 
-    try:
-        # Run detection pipeline
-        preprocessed = preprocess_pipeline_adaptive(image_data)
-        detected_rooms = detect_rooms_adaptive(preprocessed)
+    cache_path = CACHE_DIR / f"{hashlib.sha1(image_data).hexdigest()}_{_pipeline_fingerprint()}.json"
+
+    if use_cache and cache_path.exists():
+        with open(cache_path, 'r') as f:
+            detected_rooms = json.load(f)
+    else:
+        try:
+            # Run detection pipeline
+            preprocessed = preprocess_pipeline_adaptive(image_data)
+            detected_rooms = detect_rooms_adaptive(preprocessed)['rooms']
+
+            # Normalize coordinates
+            detected_rooms = normalize_coordinates(detected_rooms, preprocessed['original_shape'])
+        except Exception as e:
+            return {
+                'sample_id': sample_id,
+                'error': f'Detection failed: {str(e)}'
+            }
 
-        # Normalize coordinates
-        detected_rooms = normalize_coordinates(detected_rooms, preprocessed['original_shape'])
-    except Exception as e:
-        return {
-            'sample_id': sample_id,
-            'error': f'Detection failed: {str(e)}'
-        }
+        if use_cache:
+            CACHE_DIR.mkdir(exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump(detected_rooms, f)
 
     # Match rooms
     matches, unmatched_gt, unmatched_det = match_rooms(gt_rooms, detected_rooms)
@@ -180,7 +253,17 @@ def evaluate_sample(ground_truth_path, image_path):
     }
 
 
-def main():
+def _init_eval_worker():
+    """Keep each worker's OpenCV single-threaded so processes don't oversubscribe cores"""
+    cv2.setNumThreads(1)
+
+
+def _evaluate_sample_args(args):
+    """Unpack (ground_truth_path, image_path, use_cache) for ProcessPoolExecutor.map"""
+    return evaluate_sample(*args)
+
+
+def main(use_cache=True):
     """Run evaluation on all ground truth samples."""
 
     # Paths
@@ -197,8 +280,8 @@ def main():
     print(f"Found {len(gt_files)} ground truth files")
     print("Using ADAPTIVE detection pipeline\n")
 
-    # Evaluate each sample
-    results = []
+    # Pair each ground truth file with its image
+    samples = []
     for gt_file in gt_files:
         # Extract sample_id from filename (e.g., "sample_01_ground_truth.json" -> "sample_01")
         sample_id = gt_file.stem.replace('_ground_truth', '')
@@ -208,9 +291,18 @@ def main():
             print(f"⚠️  Image not found for {sample_id}: {image_path}")
             continue
 
-        print(f"Evaluating {sample_id}...")
-        metrics = evaluate_sample(gt_file, image_path)
-        results.append(metrics)
+        samples.append((gt_file, image_path, use_cache))
+
+    # Evaluate samples in parallel - each one is an independent pipeline run
+    print(f"Evaluating {len(samples)} samples...\n")
+    if len(samples) > 1:
+        with ProcessPoolExecutor(initializer=_init_eval_worker) as executor:
+            results = list(executor.map(_evaluate_sample_args, samples))
+    else:
+        results = [evaluate_sample(*sample) for sample in samples]
+
+    for metrics in results:
+        print(f"{metrics['sample_id']}:")
 
         # Print sample results
         if 'error' in metrics:
@@ -234,41 +326,44 @@ def main():
     # Calculate overall metrics
     valid_results = [r for r in results if 'error' not in r]
 
-    if valid_results:
-        print("\n" + "=" * 60)
-        print("OVERALL METRICS")
-        print("=" * 60)
-
-        avg_precision = sum(r['precision'] for r in valid_results) / len(valid_results)
-        avg_recall = sum(r['recall'] for r in valid_results) / len(valid_results)
-        avg_f1 = sum(r['f1_score'] for r in valid_results) / len(valid_results)
-        avg_iou = sum(r['avg_iou'] for r in valid_results) / len(valid_results)
-
-        total_gt = sum(r['num_ground_truth'] for r in valid_results)
-        total_detected = sum(r['num_detected'] for r in valid_results)
-        total_matched = sum(r['num_matched'] for r in valid_results)
-        total_fp = sum(r['num_false_positives'] for r in valid_results)
-        total_fn = sum(r['num_false_negatives'] for r in valid_results)
-
-        print(f"Samples Evaluated: {len(valid_results)}")
-        print(f"Total Ground Truth Rooms: {total_gt}")
-        print(f"Total Detected Rooms: {total_detected}")
-        print(f"Total Matched Rooms: {total_matched}")
-        print(f"Total False Positives: {total_fp}")
-        print(f"Total False Negatives: {total_fn}")
-        print()
-        print(f"Average Precision: {avg_precision:.2%}")
-        print(f"Average Recall:    {avg_recall:.2%}")
-        print(f"Average F1 Score:  {avg_f1:.2%}")
-        print(f"Average IoU:       {avg_iou:.3f}")
-        print()
+    if not valid_results:
+        print("No samples were evaluated successfully")
+        return
 
-        # Identify worst performers
-        print("Worst Performing Samples (by F1 Score):")
-        sorted_results = sorted(valid_results, key=lambda r: r['f1_score'])
-        for r in sorted_results[:3]:
-            print(f"  {r['sample_id']}: F1={r['f1_score']:.2%}, "
-                  f"Precision={r['precision']:.2%}, Recall={r['recall']:.2%}")
+    print("\n" + "=" * 60)
+    print("OVERALL METRICS")
+    print("=" * 60)
+
+    avg_precision = sum(r['precision'] for r in valid_results) / len(valid_results)
+    avg_recall = sum(r['recall'] for r in valid_results) / len(valid_results)
+    avg_f1 = sum(r['f1_score'] for r in valid_results) / len(valid_results)
+    avg_iou = sum(r['avg_iou'] for r in valid_results) / len(valid_results)
+
+    total_gt = sum(r['num_ground_truth'] for r in valid_results)
+    total_detected = sum(r['num_detected'] for r in valid_results)
+    total_matched = sum(r['num_matched'] for r in valid_results)
+    total_fp = sum(r['num_false_positives'] for r in valid_results)
+    total_fn = sum(r['num_false_negatives'] for r in valid_results)
+
+    print(f"Samples Evaluated: {len(valid_results)}")
+    print(f"Total Ground Truth Rooms: {total_gt}")
+    print(f"Total Detected Rooms: {total_detected}")
+    print(f"Total Matched Rooms: {total_matched}")
+    print(f"Total False Positives: {total_fp}")
+    print(f"Total False Negatives: {total_fn}")
+    print()
+    print(f"Average Precision: {avg_precision:.2%}")
+    print(f"Average Recall:    {avg_recall:.2%}")
+    print(f"Average F1 Score:  {avg_f1:.2%}")
+    print(f"Average IoU:       {avg_iou:.3f}")
+    print()
+
+    # Identify worst performers
+    print("Worst Performing Samples (by F1 Score):")
+    sorted_results = sorted(valid_results, key=lambda r: r['f1_score'])
+    for r in sorted_results[:3]:
+        print(f"  {r['sample_id']}: F1={r['f1_score']:.2%}, "
+              f"Precision={r['precision']:.2%}, Recall={r['recall']:.2%}")
 
     # Save detailed results
     output_path = Path(__file__).parent / 'evaluation_results.json'
@@ -293,4 +388,9 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always rerun detection instead of reusing cached results')
+    args = parser.parse_args()
+
+    main(use_cache=not args.no_cache)
@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration for serving the local API with several workers
+
+Usage:
+    pip install gunicorn
+    gunicorn -c gunicorn.conf.py local_api_server:app
+
+The Flask dev server (python local_api_server.py) handles one detection at a
+time in practice; each gunicorn worker is a separate process, so detections
+run in parallel across cores. The app is imported once in the master and
+forked into the workers.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 3000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+# A second thread per worker receives the next upload while the first is in
+# OpenCV (which releases the GIL), instead of leaving it queued on the socket
+worker_class = 'gthread'
+threads = 2
+preload_app = True
+timeout = 60
+
+
+def post_fork(server, worker):
+    """Split the cores between workers so their OpenCV thread pools don't oversubscribe"""
+    import cv2
+    cv2.setNumThreads(max(1, (os.cpu_count() or 1) // workers))
@@ -9,6 +9,10 @@ Usage:
 
 Or use improved detection:
     USE_IMPROVED_DETECTION=true python local_api_server.py
+
+To run detections in parallel across CPU cores:
+    pip install gunicorn
+    gunicorn -c gunicorn.conf.py local_api_server:app
 """
 
 import os
@@ -29,15 +33,14 @@ USE_ADAPTIVE = os.environ.get('USE_ADAPTIVE_DETECTION', 'true').lower() == 'true
 
 if USE_ADAPTIVE:
     print("✨ Using ADAPTIVE detection pipeline (auto-tuning for each blueprint)")
-    from detection.preprocessing_adaptive import preprocess_pipeline_adaptive as preprocess_pipeline
-    from detection.opencv_detector_adaptive import detect_rooms_adaptive as detect_rooms_opencv
 else:
     print("🚀 Using IMPROVED detection pipeline (fixed parameters)")
-    from detection.preprocessing_improved import preprocess_pipeline_improved as preprocess_pipeline
-    from detection.opencv_detector_improved import detect_rooms_improved as detect_rooms_opencv
+
+from detection.pipeline import get_pipeline
+preprocess_pipeline, detect_rooms_opencv = get_pipeline('adaptive' if USE_ADAPTIVE else 'improved')
 
 from detection.normalizer import normalize_coordinates
-from utils.validation import validate_image_data
+from utils.validation import read_image_stream
 from utils.error_handling import (
     error_response,
     ImageValidationError,
@@ -72,7 +75,7 @@ def detect():
     Main detection endpoint
     Accepts multipart/form-data with 'blueprint' file
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     preprocessed = None  # Initialize for error handling
 
     try:
@@ -95,17 +98,16 @@ def detect():
                 'No file selected'
             )), 400
 
-        # Read file data
-        image_data = file.read()
-        logger.info(f"Received file: {file.filename} ({len(image_data)} bytes)")
-
-        # Validate image
+        # Read and validate file data (oversized uploads are rejected
+        # before they are copied out of the request's spooled file)
         try:
-            validate_image_data(image_data)
+            image_data = read_image_stream(file.stream)
         except ImageValidationError as e:
             logger.warning(f"Validation failed: {str(e)}")
             return jsonify(error_response(422, 'INVALID_IMAGE', str(e))), 422
 
+        logger.info(f"Received file: {file.filename} ({len(image_data)} bytes)")
+
         # STEP 1: Preprocess
         logger.info("Starting preprocessing")
         preprocessed = preprocess_pipeline(image_data)
@@ -140,7 +142,7 @@ def detect():
         ) if doorways else []
 
         # Build response
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
 
         # Collect metrics
         blueprint_style = normalized_rooms[0].get('blueprint_style', 'unknown') if normalized_rooms else 'unknown'
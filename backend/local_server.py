@@ -13,6 +13,7 @@ Then access at: http://localhost:3000
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import json
 import logging
 import sys
 from pathlib import Path
@@ -76,11 +77,12 @@ def detect_rooms():
 
         logger.info(f"Received upload: {file.filename} ({len(file_data)} bytes)")
 
-        # Convert to Lambda event format
-        import base64
+        # Convert to Lambda event format. The raw bytes go in as an
+        # unencoded body, which extract_image_from_event passes through
+        # as-is, instead of a base64 round trip
         event = {
-            'body': base64.b64encode(file_data).decode('utf-8'),
-            'isBase64Encoded': True,
+            'body': file_data,
+            'isBase64Encoded': False,
             'headers': {
                 'Content-Type': file.content_type or 'image/png'
             }
@@ -98,7 +100,6 @@ def detect_rooms():
         body = response.get('body', '{}')
 
         # Return response
-        import json
         response_data = json.loads(body)
 
         return jsonify(response_data), status_code
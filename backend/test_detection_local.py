@@ -26,7 +26,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 import cv2
 import numpy as np
-from detection.preprocessing import preprocess_pipeline
+from detection.preprocessing import preprocess_pipeline_from_array
 from detection.opencv_detector import detect_rooms_opencv
 from detection.normalizer import normalize_coordinates
 
@@ -106,17 +106,15 @@ def main():
         print(f"   ✗ Error loading image: {e}")
         return 1
 
-    # Convert to bytes (simulate API upload)
-    _, encoded = cv2.imencode('.png', image)
-    image_bytes = encoded.tobytes()
-
     print(f"\n⚙️  Running detection pipeline...")
     start_time = time.time()
 
     try:
         # STEP 1: Preprocessing
         print("   [1/3] Preprocessing...")
-        preprocessed = preprocess_pipeline(image_bytes)
+        # The image is already decoded, so skip the PNG encode/decode
+        # round trip an API upload would go through
+        preprocessed = preprocess_pipeline_from_array(image)
         print(f"      ✓ Preprocessed to {preprocessed['processed'].shape}")
 
         # STEP 2: Detection
@@ -0,0 +1,44 @@
+"""
+Tests for the adaptive preprocessing denoise skip
+
+Usage:
+    python -m pytest test_preprocessing_adaptive.py
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import cv2
+import pytest
+
+from detection import preprocessing_adaptive
+
+BLUEPRINTS_DIR = Path(__file__).parent.parent / 'test_data' / 'blueprints'
+
+
+def run_counting_denoise(monkeypatch, filename: str) -> int:
+    """Run the adaptive pipeline on a test blueprint, returning how often NLM denoising ran"""
+    calls = []
+    real_denoise = cv2.fastNlMeansDenoising
+
+    def counting_denoise(*args, **kwargs):
+        calls.append(args)
+        return real_denoise(*args, **kwargs)
+
+    monkeypatch.setattr(preprocessing_adaptive.cv2, 'fastNlMeansDenoising', counting_denoise)
+    image_data = (BLUEPRINTS_DIR / filename).read_bytes()
+    preprocessing_adaptive.preprocess_pipeline_adaptive(image_data)
+    return len(calls)
+
+
+@pytest.mark.parametrize('filename', ['simple.png', 'office.png'])
+def test_clean_cad_skips_denoise(monkeypatch, filename):
+    assert run_counting_denoise(monkeypatch, filename) == 0
+
+
+@pytest.mark.parametrize('filename', ['sample_01.png', 'sample_02.png'])
+def test_scanned_blueprint_is_denoised(monkeypatch, filename):
+    assert run_counting_denoise(monkeypatch, filename) == 1
@@ -6,6 +6,12 @@ Standardized error responses and custom exceptions
 import json
 from typing import Dict, Any, List, Optional
 
+# Headers sent with every API Gateway response
+RESPONSE_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+
 
 class ImageValidationError(Exception):
     """Raised when image validation fails"""
@@ -57,9 +63,6 @@ def error_response(
 
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
+        'headers': dict(RESPONSE_HEADERS),
         'body': json.dumps(body)
     }
@@ -3,6 +3,7 @@ Input Validation
 Validates blueprint image data before processing
 """
 
+import io
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,6 +12,13 @@ logger = logging.getLogger(__name__)
 MIN_FILE_SIZE = 10_000        # 10 KB
 MAX_FILE_SIZE = 10_485_760    # 10 MB
 
+# Supported file signatures (magic bytes)
+IMAGE_SIGNATURES = (
+    b'\x89PNG\r\n\x1a\n',  # PNG
+    b'\xff\xd8',           # JPEG
+    b'%PDF',               # PDF
+)
+
 
 class ImageValidationError(Exception):
     """Raised when image validation fails"""
@@ -54,6 +62,41 @@ def validate_image_data(image_data: bytes) -> None:
     logger.info(f"Image validation passed: {file_size / 1024:.1f} KB")
 
 
+def read_image_stream(stream) -> bytes:
+    """
+    Read and validate an uploaded image from a file-like stream
+
+    Seekable streams (e.g. a spooled multipart upload) are size-checked
+    before anything is read, so oversized files are rejected without being
+    copied into memory. Other streams are read at most one byte past the
+    size limit.
+
+    Args:
+        stream: Binary file-like object positioned at the start of the image
+
+    Returns:
+        Raw image bytes
+
+    Raises:
+        ImageValidationError: If validation fails
+    """
+
+    if stream.seekable():
+        start = stream.tell()
+        file_size = stream.seek(0, io.SEEK_END) - start
+        stream.seek(start)
+
+        if file_size > MAX_FILE_SIZE:
+            raise ImageValidationError(
+                f"File too large ({file_size / 1024 / 1024:.1f} MB). Maximum size is 10 MB."
+            )
+
+    image_data = stream.read(MAX_FILE_SIZE + 1)
+    validate_image_data(image_data)
+
+    return image_data
+
+
 def is_valid_image_format(image_data: bytes) -> bool:
     """
     Check if image data has valid file signature (magic bytes)
@@ -68,16 +111,5 @@ def is_valid_image_format(image_data: bytes) -> bool:
     if len(image_data) < 8:
         return False
 
-    # PNG signature
-    if image_data[:8] == b'\x89PNG\r\n\x1a\n':
-        return True
-
-    # JPEG signature
-    if image_data[:2] == b'\xff\xd8':
-        return True
-
-    # PDF signature
-    if image_data[:4] == b'%PDF':
-        return True
-
-    return False
+    # One startswith() call checks every signature without slicing copies
+    return image_data.startswith(IMAGE_SIGNATURES)
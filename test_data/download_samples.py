@@ -15,52 +15,178 @@ Usage:
 import os
 import argparse
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 from pathlib import Path
 
+DATASET = 'emarva/cubicasa5k'
+DATASET_ZIP = 'cubicasa5k.zip'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Concurrent file downloads; each one is its own HTTPS connection
+DOWNLOAD_WORKERS = 16
+
+
+def get_kaggle_api():
+    """Authenticate with the Kaggle API using ~/.kaggle/kaggle.json"""
+    from kaggle.api.kaggle_api_extended import KaggleApi
+
+    api = KaggleApi()
+    api.authenticate()
+    return api
+
 
 def download_dataset():
-    """Download CubiCasa5k dataset using Kaggle API"""
+    """Download the full CubiCasa5k archive using Kaggle API"""
     print("Downloading CubiCasa5k dataset...")
-    os.system("kaggle datasets download -d emarva/cubicasa5k")
+    get_kaggle_api().dataset_download_files(DATASET, path='.', quiet=False)
     print("Download complete!")
 
 
-def extract_samples(num_samples=10):
-    """Extract a subset of blueprints for testing"""
+def list_image_files(api, num_files):
+    """List the first num_files image files in the dataset, page by page"""
+    image_files = []
+    page_token = None
+
+    while len(image_files) < num_files:
+        result = api.dataset_list_files(DATASET, page_token=page_token)
+        image_files += [f.name for f in result.files if f.name.endswith(IMAGE_EXTENSIONS)]
+
+        page_token = getattr(result, 'nextPageToken', None)
+        if not page_token:
+            break
+
+    return image_files[:num_files]
+
+
+def download_file(api, file_name, path):
+    """Download one dataset file, unpacking it if Kaggle sent it zipped"""
     import zipfile
 
-    dataset_zip = "cubicasa5k.zip"
+    os.makedirs(path, exist_ok=True)
+    api.dataset_download_file(DATASET, file_name, path=path, quiet=True)
 
-    if not os.path.exists(dataset_zip):
-        print("Dataset not found. Downloading...")
-        download_dataset()
+    local_file = os.path.join(path, os.path.basename(file_name))
+    if not os.path.exists(local_file) and os.path.exists(local_file + '.zip'):
+        with zipfile.ZipFile(local_file + '.zip', 'r') as zip_ref:
+            zip_ref.extractall(path)
+        os.remove(local_file + '.zip')
+
+    return local_file
+
+
+def download_samples(num_samples):
+    """
+    Download just the sample images instead of the multi-GB archive
+
+    Files are fetched in parallel, so the download is bounded by bandwidth
+    rather than one connection's round trips.
+
+    Returns:
+        List of (dataset file name, local path) in dataset order
+    """
+    api = get_kaggle_api()
+    samples = list_image_files(api, num_samples)
 
-    print(f"Extracting {num_samples} sample blueprints...")
+    print(f"Downloading {len(samples)} sample blueprints...")
 
-    with zipfile.ZipFile(dataset_zip, 'r') as zip_ref:
-        # Get list of image files
-        image_files = [f for f in zip_ref.namelist() if f.endswith(('.png', '.jpg', '.jpeg'))]
+    local_files = {}
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        # Each file gets its own directory, since names repeat across plans
+        futures = {
+            executor.submit(download_file, api, sample, os.path.join('temp', f'{i:02d}')): sample
+            for i, sample in enumerate(samples, 1)
+        }
+        for future in as_completed(futures):
+            local_files[futures[future]] = future.result()
 
-        # Take first num_samples
-        samples = image_files[:num_samples]
+    return [(sample, local_files[sample]) for sample in samples]
 
-        # Extract to blueprints directory
-        for i, sample in enumerate(samples, 1):
-            zip_ref.extract(sample, 'temp/')
 
-            # Copy to blueprints folder with clean name
-            src = os.path.join('temp', sample)
-            dst = f'blueprints/sample_{i:02d}.png'
-            shutil.copy(src, dst)
+def sample_destinations(index):
+    """Paths a sample is saved to: the test blueprints and the frontend's public folder"""
+    name = f'sample_{index:02d}.png'
+    return [
+        os.path.join('blueprints', name),
+        os.path.join('..', 'frontend', 'public', 'sample_blueprints', name),
+    ]
+
+
+def extract_entry(zip_ref, sample, destinations):
+    """Inflate one archive entry once, writing it to every destination"""
+    buffer = bytearray(1 << 20)
+    view = memoryview(buffer)
+
+    with zip_ref.open(sample) as src:
+        outputs = [open(path, 'wb') for path in destinations]
+        try:
+            while n := src.readinto(buffer):
+                for out in outputs:
+                    out.write(view[:n])
+        finally:
+            for out in outputs:
+                out.close()
+
+
+def extract_from_archive(num_samples):
+    """Extract the first num_samples images from an already downloaded archive"""
+    import zipfile
+
+    with zipfile.ZipFile(DATASET_ZIP, 'r') as zip_ref:
+        # Take the first num_samples image entries, stopping the scan there.
+        # ZipInfo objects let zip_ref.open() skip the name lookup
+        samples = list(islice(
+            (info for info in zip_ref.infolist() if info.filename.endswith(IMAGE_EXTENSIONS)),
+            num_samples
+        ))
+
+        # ZipFile serializes only the raw reads between threads; inflating
+        # (zlib releases the GIL) and writing the entries run in parallel.
+        # Entries go straight to their destinations, with no temp/ staging
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            futures = [
+                executor.submit(extract_entry, zip_ref, sample, sample_destinations(i))
+                for i, sample in enumerate(samples, 1)
+            ]
+            for future in futures:
+                future.result()
+
+    return [info.filename for info in samples]
+
+
+def extract_samples(num_samples=10):
+    """Extract a subset of blueprints for testing"""
+    import zipfile
+
+    samples = None
+
+    if os.path.exists(DATASET_ZIP):
+        print(f"Extracting {num_samples} sample blueprints...")
+        try:
+            samples = extract_from_archive(num_samples)
+        except zipfile.BadZipFile as e:
+            # An interrupted download leaves a file with no central directory
+            # (it is written last), so it fails here before anything is extracted
+            print(f"⚠️  {DATASET_ZIP} is incomplete or corrupt ({e}). Downloading samples only...")
+    else:
+        print("Dataset not found. Downloading samples only...")
+
+    if samples is None:
+        downloads = download_samples(num_samples)
 
-            # Also copy to frontend public folder
-            frontend_dst = f'../frontend/public/sample_blueprints/sample_{i:02d}.png'
-            shutil.copy(src, frontend_dst)
+        # Move each download into place, then copy it to the frontend
+        samples = []
+        for i, (sample, src) in enumerate(downloads, 1):
+            dst, frontend_dst = sample_destinations(i)
+            shutil.move(src, dst)
+            shutil.copyfile(dst, frontend_dst)
+            samples.append(sample)
 
-            print(f"  ✓ Extracted: {sample} → sample_{i:02d}.png")
+        # Cleanup
+        shutil.rmtree('temp', ignore_errors=True)
 
-    # Cleanup
-    shutil.rmtree('temp', ignore_errors=True)
+    for i, sample in enumerate(samples, 1):
+        print(f"  ✓ Extracted: {sample} → sample_{i:02d}.png")
 
     print(f"\n✅ {num_samples} samples ready in:")
     print(f"   - test_data/blueprints/")
@@ -72,7 +198,7 @@ def main():
     parser.add_argument('--num-samples', type=int, default=10,
                       help='Number of samples to extract (default: 10)')
     parser.add_argument('--download-only', action='store_true',
-                      help='Only download, don\'t extract')
+                      help='Only download the full archive, don\'t extract')
 
     args = parser.parse_args()
 
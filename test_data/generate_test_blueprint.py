@@ -11,8 +11,6 @@ Usage:
 """
 
 import argparse
-import cv2
-import numpy as np
 from pathlib import Path
 
 
@@ -22,8 +20,11 @@ def generate_simple_blueprint(width=2000, height=1500):
     - 2 bedrooms
     - 1 hallway
     """
+    import cv2
+    import numpy as np
+
     # White background
-    image = np.ones((height, width), dtype=np.uint8) * 255
+    image = np.full((height, width), 255, dtype=np.uint8)
 
     # Draw walls (black lines)
     wall_thickness = 10
@@ -60,7 +61,10 @@ def generate_complex_blueprint(width=2500, height=2000):
     - 2 hallways
     - Irregular shapes
     """
-    image = np.ones((height, width), dtype=np.uint8) * 255
+    import cv2
+    import numpy as np
+
+    image = np.full((height, width), 255, dtype=np.uint8)
     wall_thickness = 12
 
     # Outer boundary
@@ -102,7 +106,10 @@ def generate_office_blueprint(width=3000, height=2000):
     - Conference room
     - Kitchen
     """
-    image = np.ones((height, width), dtype=np.uint8) * 255
+    import cv2
+    import numpy as np
+
+    image = np.full((height, width), 255, dtype=np.uint8)
     wall_thickness = 10
 
     # Outer boundary
@@ -159,6 +166,7 @@ def main():
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
+    import cv2
     cv2.imwrite(str(output_path), blueprint)
 
     print(f"✅ Blueprint saved to: {output_path}")